@@ -5,6 +5,7 @@ import sqlalchemy as sqla
 
 from dtbase.backend.database import queries, utils
 from dtbase.backend.database.structure import (
+    Base,
     Location,
     LocationIdentifier,
     LocationSchema,
@@ -14,6 +15,18 @@ from dtbase.backend.database.utils import Session
 from dtbase.backend.exc import RowExistsError, RowMissingError, TooManyRowsError
 
 
+def _location_value(value: (float | str), location_id: str, identifier_id: str) -> Base:
+    """Make a location value object of the right class for the type of `value`."""
+    value_type = type(value)
+    if value_type not in utils.location_value_class_dict:
+        msg = f"Don't know how to insert location values of type {value_type}."
+        raise ValueError(msg)
+    value_class = utils.location_value_class_dict[value_type]
+    return value_class(
+        location_id=location_id, identifier_id=identifier_id, value=value
+    )
+
+
 def insert_location_value(
     value: (float | str),
     location_id: str,
@@ -31,14 +44,7 @@ def insert_location_value(
     Returns:
         None
     """
-    value_type = type(value)
-    if value_type not in utils.location_value_class_dict:
-        msg = f"Don't know how to insert location values of type {value_type}."
-        raise ValueError(msg)
-    value_class = utils.location_value_class_dict[value_type]
-    session.add(
-        value_class(location_id=location_id, identifier_id=identifier_id, value=value)
-    )
+    session.add(_location_value(value, location_id, identifier_id))
     session.flush()
 
 
@@ -138,9 +144,11 @@ def insert_location(
     new_location = Location(schema_id=schema_id)
     session.add(new_location)
     session.flush()
+    # Add all the coordinates before flushing, so that they are inserted together.
     for identifier_id, identifier_name, _ in identifiers_result:
         value = coordinates[identifier_name]
-        insert_location_value(value, new_location.id, identifier_id, session=session)
+        session.add(_location_value(value, new_location.id, identifier_id))
+    session.flush()
 
 
 def insert_location_identifier(
@@ -209,8 +217,22 @@ def insert_location_schema(
     new_schema = LocationSchema(name=name, description=description)
     session.add(new_schema)
     session.flush()
+    # Look up the ids of all the identifiers with a single query.
+    query = sqla.select(LocationIdentifier.name, LocationIdentifier.id).where(
+        LocationIdentifier.name.in_(identifiers)
+    )
+    identifier_ids: Dict[str, List[int]] = {}
+    for identifier_name, identifier_id in session.execute(query):
+        identifier_ids.setdefault(identifier_name, []).append(identifier_id)
     for identifier_name in identifiers:
-        identifier_id = identifier_id_from_name(identifier_name, session=session)
+        ids = identifier_ids.get(identifier_name, [])
+        if len(ids) == 0:
+            raise RowMissingError(f"No location identifier '{identifier_name}'")
+        if len(ids) > 1:
+            raise TooManyRowsError(
+                f"Multiple location identifiers named {identifier_name}"
+            )
+        identifier_id = ids[0]
         session.add(
             LocationSchemaIdentifierRelation(
                 schema_id=new_schema.id, identifier_id=identifier_id
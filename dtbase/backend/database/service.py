@@ -212,6 +212,7 @@ def list_runs(
     session: Session,
     service_name: Optional[str] = None,
     parameter_set_name: Optional[str] = None,
+    limit: Optional[int] = None,
 ) -> list[dict]:
     """
     Get the run history for a given service.
@@ -223,9 +224,11 @@ def list_runs(
         parameter_set_name: Optional service parameter set name. If None
             (default), return run history for all sets. Can only be provided if
             service_name is also provided.
+        limit: Optional maximum number of runs to return. If None (default), return
+            all of them.
 
     Returns:
-        List of run history rows, as dictionaries.
+        List of run history rows, as dictionaries, most recent first.
     """
     if service_name is None and parameter_set_name is not None:
         raise ValueError("parameter_set_name cannot be provided without service_name.")
@@ -249,6 +252,9 @@ def list_runs(
         query = query.where(Service.name == service_name)
     if parameter_set_name is not None:
         query = query.where(ServiceParameterSet.name == parameter_set_name)
+    query = query.order_by(ServiceRunLog.timestamp.desc())
+    if limit is not None:
+        query = query.limit(limit)
     result = session.execute(query).mappings().all()
     result = utils.row_mappings_to_dicts(result)
     return result
@@ -10,8 +10,7 @@ from typing import Generator, Optional
 
 import sqlalchemy as sqla
 import sqlalchemy_utils as sqla_utils
-from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
-from sqlalchemy.engine import Engine, RowMapping
+from sqlalchemy.engine import Connection, Engine, RowMapping
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session as SqlaSession
 from sqlalchemy.orm import sessionmaker
@@ -113,9 +112,13 @@ def db_session() -> Generator[Session, None, None]:
         yield session
 
 
-def create_tables(engine: Engine) -> None:
-    """Create all the tables for the database."""
-    Base.metadata.create_all(engine)
+def create_tables(engine: Engine | Connection, checkfirst: bool = True) -> None:
+    """Create all the tables for the database.
+
+    If `checkfirst` is False, don't check whether each table exists before creating it.
+    Passing a connection, rather than an engine, creates the tables in its transaction.
+    """
+    Base.metadata.create_all(engine, checkfirst=checkfirst)
 
 
 def connect_db(conn_string: str, db_name: str) -> Engine:
@@ -146,7 +149,7 @@ def connect_db(conn_string: str, db_name: str) -> Engine:
     return engine
 
 
-def drop_tables(engine: Engine) -> None:
+def drop_tables(engine: Engine | Connection) -> None:
     """Drop all tables in the database."""
     Base.metadata.drop_all(engine)
 
@@ -165,27 +168,8 @@ def drop_db(conn_string: str, db_name: str) -> None:
     db_conn_string = "{}/{}".format(conn_string, db_name)
 
     if sqla_utils.database_exists(db_conn_string):
-        # Connect to the db
-        engine = connect_db(conn_string, db_name)
-
-        # Disconnects all users from the db we want to drop
-        connection = engine.connect()
-        connection.connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
-
-        version = connection.dialect.server_version_info
-        pid_column = "pid" if (version >= (9, 2)) else "procpid"
-        text = """
-        SELECT pg_terminate_backend(pg_stat_activity.%(pid_column)s)
-        FROM pg_stat_activity
-        WHERE pg_stat_activity.datname = '%(database)s'
-          AND %(pid_column)s <> pg_backend_pid();
-        """ % {
-            "pid_column": pid_column,
-            "database": db_name,
-        }
-        connection.execute(sqla.text(text))
-
-        # Drops db
+        # For Postgres, drop_database disconnects all other users from the db before
+        # dropping it, in the same connection.
         sqla_utils.drop_database(db_conn_string)
 
 
@@ -217,6 +217,7 @@ def run_service(
 class ListServiceRunsRequest(BaseModel):
     service_name: Optional[str] = Field(None)
     parameter_set_name: Optional[str] = Field(None)
+    limit: Optional[int] = Field(None)
 
 
 class ServiceRun(BaseModel):
@@ -233,12 +234,15 @@ def list_runs(
     payload: Optional[ListServiceRunsRequest] = None,
     session: Session = Depends(db_session),
 ) -> list[ServiceRun]:
-    """List all runs of a service.
+    """List all runs of a service, most recent first.
 
     Filtering by service name and/or parameter set name is optional. Filtering by
-    parameter set can only be done if a service name is provided.
+    parameter set can only be done if a service name is provided. Optionally, `limit`
+    caps the number of runs returned.
     """
     if payload is None:
-        payload = ListServiceRunsRequest(service_name=None, parameter_set_name=None)
+        payload = ListServiceRunsRequest(
+            service_name=None, parameter_set_name=None, limit=None
+        )
     runs = service.list_runs(session=session, **payload.model_dump())
     return [ServiceRun(**r) for r in runs]
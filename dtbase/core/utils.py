@@ -1,31 +1,90 @@
 """
 Utilities (miscellaneous routines) module
 """
+import functools
 import logging
-from typing import Optional
+from typing import Optional, Union
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from dtbase.core.constants import CONST_BACKEND_URL as BACKEND_URL
 from dtbase.core.constants import DEFAULT_USER_EMAIL, DEFAULT_USER_PASS
 from dtbase.core.exc import BackendCallError
 
 
+def make_backend_session() -> requests.Session:
+    """Create a requests session for talking to the backend.
+
+    The session keeps connections alive and pools them, so that consecutive calls to
+    the backend don't each need a new TCP (and possibly TLS) handshake. Failures to
+    connect are retried a few times, since no request has been sent in that case.
+    Idempotent requests, such as GETs, are also retried if a proxy in front of the
+    backend responds with a 502, 503 or 504.
+    """
+    session = requests.Session()
+    retries = Retry(
+        total=3,
+        connect=3,
+        read=0,
+        status=2,
+        status_forcelist=(502, 503, 504),
+        raise_on_status=False,
+        backoff_factor=0.1,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=64, max_retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# The session shared by all calls to backend_call, and its methods for each type of
+# request, looked up once rather than on every call.
+BACKEND_SESSION = make_backend_session()
+BACKEND_METHODS = {
+    request_type: getattr(BACKEND_SESSION, request_type)
+    for request_type in ("get", "post", "put", "delete", "patch", "head", "options")
+}
+
+# The default timeouts, in seconds, for connecting to the backend and for waiting for
+# it to respond, so that a stalled backend can't hold up the caller indefinitely.
+BACKEND_TIMEOUT = (3.05, 30)
+
+
+@functools.lru_cache(maxsize=128)
+def _backend_url(end_point_path: str) -> str:
+    """Return the full URL of a backend end point.
+
+    The backend is called at a small set of end points, so the URLs are cached rather
+    than rebuilt for every call.
+    """
+    return f"{BACKEND_URL}{end_point_path}"
+
+
 def backend_call(
     request_type: str,
     end_point_path: str,
     payload: Optional[dict] = None,
     headers: Optional[dict] = None,
+    timeout: Union[float, tuple[float, float], None] = BACKEND_TIMEOUT,
 ) -> requests.Response:
-    """Make an API call to the backend server."""
+    """Make an API call to the backend server.
+
+    `timeout` is passed on to `requests`, and is either a single timeout or a tuple of
+    connect and read timeouts, in seconds. None means waiting forever.
+    """
     headers = {} if headers is None else headers
-    request_func = getattr(requests, request_type)
-    url = f"{BACKEND_URL}{end_point_path}"
+    try:
+        request_func = BACKEND_METHODS[request_type]
+    except KeyError:
+        raise ValueError(f"Unknown request type: {request_type}")
+    url = _backend_url(end_point_path)
     if payload:
-        headers = headers | {"content-type": "application/json"}
-        response = request_func(url, headers=headers, json=payload)
+        # Passing the payload as `json` also sets the content-type header.
+        response = request_func(url, headers=headers, json=payload, timeout=timeout)
     else:
-        response = request_func(url, headers=headers)
+        response = request_func(url, headers=headers, timeout=timeout)
     return response
 
 
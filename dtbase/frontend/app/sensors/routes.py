@@ -3,8 +3,7 @@ A module for the main dashboard actions
 """
 import datetime as dt
 import json
-import re
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import pandas as pd
 from dateutil.parser import parse
@@ -15,6 +14,10 @@ from werkzeug.wrappers import Response
 from dtbase.core.constants import CONST_MAX_RECORDS
 from dtbase.frontend import utils
 from dtbase.frontend.app.sensors import blueprint
+from dtbase.frontend.user import User
+
+# Translation table for normalising the separators in a list of sensor ids.
+_SENSOR_ID_SEPARATORS = str.maketrans(";", ",")
 
 
 def fetch_all_sensor_types() -> List[dict]:
@@ -36,17 +39,23 @@ def fetch_all_sensor_types() -> List[dict]:
     return sensor_types
 
 
-def fetch_all_sensors(sensor_type: str) -> List[dict[str, Any]]:
+def fetch_all_sensors(
+    sensor_type: str, user: Optional[User] = None
+) -> List[dict[str, Any]]:
     """Get all sensors of a given sensor type from the database.
     Args:
         sensor_type: The name of the sensor type.
+        user: The user to make the backend call as. By default `current_user`, which is
+            only available in the thread handling the request.
     Returns:
         List of dictionaries, one for each sensor.
     """
     if not sensor_type:
         return []
+    if user is None:
+        user = current_user
     payload = {"type_name": sensor_type}
-    response = current_user.backend_call("post", "/sensor/list-sensors", payload)
+    response = user.backend_call("post", "/sensor/list-sensors", payload)
     if response.status_code != 200:
         # TODO Write a more useful reaction to this.
         raise RuntimeError(f"A backend call failed: {response}")
@@ -78,15 +87,14 @@ def fetch_sensor_data(
         dt_from = parse(dt_from)
     if isinstance(dt_to, str):
         dt_to = parse(dt_to)
-    dt_from = dt_from.isoformat()
-    dt_to = dt_to.isoformat()
+    # The time period is the same for every call, so put it in the payload just once.
+    base_payload = {"dt_from": dt_from.isoformat(), "dt_to": dt_to.isoformat()}
 
     for sensor_id in sensor_ids:
-        measure_readings_list = []
+        timestamps_by_measure = {}
+        values_by_measure = {}
         for measure in measures:
-            payload = {
-                "dt_from": dt_from,
-                "dt_to": dt_to,
+            payload = base_payload | {
                 "measure_name": measure["name"],
                 "unique_identifier": sensor_id,
             }
@@ -97,17 +105,62 @@ def fetch_sensor_data(
                 # TODO Write a more useful reaction to this.
                 raise RuntimeError(f"A backend call failed: {response}")
             readings = response.json()
-            index = [x["timestamp"] for x in readings]
-            values = [x["value"] for x in readings]
-            index = list(map(parse, index))
-            series = pd.Series(data=values, index=index, name=measure["name"])
-            measure_readings_list.append(series)
-        df = pd.concat(measure_readings_list, axis=1)
-        df = df.sort_index().reset_index(names="timestamp")
-        result[sensor_id] = df
+            timestamps_by_measure[measure["name"]] = [x["timestamp"] for x in readings]
+            values_by_measure[measure["name"]] = [x["value"] for x in readings]
+        result[sensor_id] = _readings_to_dataframe(
+            timestamps_by_measure, values_by_measure
+        )
     return result
 
 
+def _parse_timestamps(timestamps: List[str]) -> pd.DatetimeIndex:
+    """Parse the ISO 8601 timestamps returned by the backend.
+
+    Parsing them all at once with pandas is much faster than parsing them one by one
+    with dateutil.
+    """
+    return pd.to_datetime(timestamps, format="ISO8601")
+
+
+def _readings_to_dataframe(
+    timestamps_by_measure: Dict[str, List[str]],
+    values_by_measure: Dict[str, List[Any]],
+) -> pd.DataFrame:
+    """Combine the readings of several measures of one sensor into a DataFrame.
+
+    Args:
+        timestamps_by_measure: Dictionary with keys being measure names and values
+            being lists of timestamps, as returned by the backend.
+        values_by_measure: Dictionary with the same keys, and values being lists of
+            readings, in the same order as the timestamps.
+    Returns:
+        DataFrame with a column for timestamp and one for each measure, sorted by
+        timestamp.
+    """
+    timestamp_lists = list(timestamps_by_measure.values())
+    if not any(timestamp_lists):
+        # No readings at all for this sensor, so there's nothing to combine.
+        return pd.DataFrame(columns=["timestamp", *timestamps_by_measure])
+    if all(ts == timestamp_lists[0] for ts in timestamp_lists):
+        # The common case: all measures were read at the same times, so the columns
+        # line up as they are and there's no need to align them on an index.
+        df = pd.DataFrame(
+            {"timestamp": _parse_timestamps(timestamp_lists[0]), **values_by_measure}
+        )
+        if not df["timestamp"].is_monotonic_increasing:
+            df = df.sort_values("timestamp", kind="mergesort", ignore_index=True)
+        return df
+    series_list = [
+        pd.Series(data=values, index=_parse_timestamps(timestamps), name=name)
+        for (name, timestamps), values in zip(
+            timestamps_by_measure.items(), values_by_measure.values()
+        )
+    ]
+    df = pd.concat(series_list, axis=1)
+    df = df.sort_index().reset_index(names="timestamp")
+    return df
+
+
 @blueprint.route("/time-series-plots", methods=["GET", "POST"])
 @login_required
 def time_series_plots() -> Response:
@@ -120,16 +173,31 @@ def time_series_plots() -> Response:
     if sensor_ids is not None:
         # sensor_ids is passed as a comma-separated (or semicolon, although those aren't
         # currently used) string, split it into a list of ids.
-        sensor_ids = tuple(re.split(r"[;,]+", sensor_ids.rstrip(",;")))
-    sensor_types = fetch_all_sensor_types()
+        sensor_ids = tuple(
+            x for x in sensor_ids.translate(_SENSOR_ID_SEPARATORS).split(",") if x
+        )
     sensor_type_name = utils.parse_url_parameter(request, "sensorType")
+    if sensor_type_name is not None:
+        # We already know the sensor type, so we can get its sensors at the same time
+        # as the list of sensor types.
+        all_sensors_future = utils.submit_backend_call(
+            fetch_all_sensors, sensor_type_name, current_user._get_current_object()
+        )
+    else:
+        all_sensors_future = None
+    sensor_types = fetch_all_sensor_types()
     if sensor_types:
         if sensor_type_name is None:
             # By default, just pick the first sensor type in the list.
             sensor_type_name = sensor_types[0]["name"]
     else:
         sensor_type_name = None
-    all_sensors = fetch_all_sensors(sensor_type_name)
+    if all_sensors_future is not None:
+        all_sensors = all_sensors_future.result()
+        if sensor_type_name is None:
+            all_sensors = []
+    else:
+        all_sensors = fetch_all_sensors(sensor_type_name)
 
     # If we don't have the information necessary to plot data for sensors, just render
     # the selector version of the page.
@@ -228,7 +296,6 @@ def sensor_readings() -> Response | str:
         sensor_data = fetch_sensor_data(dt_from, dt_to, measures, [sensor_id])
         # get the DataFrame for this sensor, and convert to dict
         sensor_data = sensor_data[sensor_id]
-        sensor_data["timestamp"].map(lambda x: x.isoformat())
         sensor_data = sensor_data.to_dict("records")
     else:
         measure_names = None
@@ -1,6 +1,7 @@
 """
 A module for the routes under /services.
 """
+import functools
 import http.client
 import json
 from typing import Any, Optional
@@ -12,6 +13,19 @@ from pydantic import BaseModel
 from dtbase.frontend.app.base.forms import NewServiceForm
 from dtbase.frontend.app.services import blueprint
 
+# How many of the most recent runs of a service to show on its details page.
+RUN_HISTORY_LIMIT = 100
+
+# Colours for displaying HTTP status codes, keyed by the class of the status code, i.e.
+# its first digit.
+STATUS_CLASS_COLOURS = {
+    1: "#040078",
+    2: "#147800",
+    3: "#54652A",
+    4: "#780000",
+    5: "#784E00",
+}
+
 
 @blueprint.route("/index", methods=["GET", "POST"])
 @login_required
@@ -73,8 +87,11 @@ def _get_service_details(request_args: Any) -> Service:
     response = current_user.backend_call("get", "/service/list-services")
     if response.status_code != 200:
         flash("Failed to retrieve list of services", "error")
-    services = [Service(**s) for s in response.json()]
-    service = next((x for x in services if x.name == service_name), None)
+    # The backend has already validated these, so skip doing it again.
+    services_by_name = {
+        s["name"]: Service.model_construct(**s) for s in response.json()
+    }
+    service = services_by_name.get(service_name)
     if service is None:
         flash(f"Service {service_name} not found", "error")
         raise ValueError(f"Service {service_name} not found")
@@ -86,7 +103,8 @@ def _get_current_parameter_set(
 ) -> Optional[ParameterSet]:
     if set_name is None:
         return None
-    parameter_set = next((x for x in parameter_sets if x.name == set_name), None)
+    parameter_sets_by_name = {x.name: x for x in parameter_sets}
+    parameter_set = parameter_sets_by_name.get(set_name)
     if parameter_set is None:
         flash(f"Parameter set {set_name} not found", "error")
     return parameter_set
@@ -98,7 +116,8 @@ def _get_parameter_sets(service: Service) -> list[ParameterSet]:
     )
     if response.status_code != 200:
         flash("Failed to retrieve parameter sets", "error")
-    parameter_sets = [ParameterSet(**s) for s in response.json()]
+    # The backend has already validated these, so skip doing it again.
+    parameter_sets = [ParameterSet.model_construct(**s) for s in response.json()]
     return parameter_sets
 
 
@@ -182,17 +201,28 @@ def _handle_run_named(service: Service, parameter_set_name_to_run: str) -> None:
 
 
 def _get_run_history(service: Service) -> list[dict[str, Any]]:
-    """Get the call history of the service."""
-    response = current_user.backend_call(
-        "post", "/service/list-runs", payload={"service_name": service.name}
-    )
+    """Get the most recent calls of the service, newest first."""
+    payload = {"service_name": service.name, "limit": RUN_HISTORY_LIMIT}
+    response = current_user.backend_call("post", "/service/list-runs", payload=payload)
     runs = response.json()
     if response.status_code != 200 or runs is None:
         flash("Failed to retrieve run history", "error")
-    runs = list(sorted(runs, key=lambda x: x["timestamp"], reverse=True))
     return runs
 
 
+@functools.lru_cache(maxsize=None)
+def _status_display(status_code: int) -> tuple[str, str]:
+    """Get the verbal description of an HTTP status code, and the colour to show it in.
+
+    There are only a handful of distinct status codes, so this is cached rather than
+    being worked out anew for every run in the run history.
+    """
+    description = http.client.responses.get(status_code, "Unknown status")
+    # Anything below 200 counts as 1xx and anything from 600 up as 5xx.
+    status_class = min(max(status_code // 100, 1), 5)
+    return description, STATUS_CLASS_COLOURS[status_class]
+
+
 @blueprint.route("/details", methods=["GET", "POST"])
 @login_required
 def details() -> str:
@@ -246,20 +276,9 @@ def details() -> str:
     # Get the verbal descriptions of return status codes, and associate them with
     # colours.
     for run in run_history:
-        status_code = run["response_status_code"]
-        run["status_description"] = http.client.responses.get(
-            status_code, "Unknown status"
-        )
-        if status_code < 200:
-            run["status_colour"] = "#040078"
-        elif 200 <= status_code < 300:
-            run["status_colour"] = "#147800"
-        elif 300 <= status_code < 400:
-            run["status_colour"] = "#54652A"
-        elif 400 <= status_code < 500:
-            run["status_colour"] = "#780000"
-        else:
-            run["status_colour"] = "#784E00"
+        status_description, status_colour = _status_display(run["response_status_code"])
+        run["status_description"] = status_description
+        run["status_colour"] = status_colour
 
     return render_template(
         "service_details.html",
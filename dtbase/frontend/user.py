@@ -1,12 +1,91 @@
+import threading
+import time
+from collections import OrderedDict
 from typing import Optional
 
 from flask_login import UserMixin
+from requests.exceptions import JSONDecodeError
 from requests.models import Response
 
 import dtbase.frontend.exc as exc
 from dtbase.core.utils import backend_call
 
-ALL_USERS = {}
+# The most users to keep in memory at once. Beyond this, the least recently used users
+# are forgotten, and will have to log in again.
+MAX_USERS = 1024
+
+# Authenticated users, by email, in order from least to most recently used.
+ALL_USERS: OrderedDict[str, "User"] = OrderedDict()
+ALL_USERS_LOCK = threading.Lock()
+
+# How long, in seconds, to reuse the response to a GET request to the backend, and how
+# many such responses to keep. This spares pages that make the same GET request several
+# times, or get reloaded in quick succession, from repeated round trips to the backend.
+# The time is kept short, since other users, or other processes serving the frontend,
+# may change the data in the meanwhile.
+RESPONSE_CACHE_TTL = 5.0
+RESPONSE_CACHE_MAXSIZE = 512
+
+# Cached responses keyed by user email and end point, in the order they were cached,
+# with the time at which they were cached.
+RESPONSE_CACHE: OrderedDict[tuple[str, str], tuple[float, Response]] = OrderedDict()
+RESPONSE_CACHE_LOCK = threading.Lock()
+
+# Many end points take a POST request even though they only read data. These are
+# recognised by their name, e.g. /sensor/list-sensors, or listed here in full. Calling
+# them doesn't invalidate any cached responses.
+READ_ONLY_NAME_PREFIXES = ("list-", "get-")
+READ_ONLY_END_POINTS = frozenset(("/sensor/sensor-readings",))
+
+
+def _get_cached_response(email: str, end_point_path: str) -> Optional[Response]:
+    """Get a cached response, if there is one that hasn't expired."""
+    with RESPONSE_CACHE_LOCK:
+        cached = RESPONSE_CACHE.get((email, end_point_path))
+    if cached is None:
+        return None
+    cache_time, response = cached
+    if time.monotonic() - cache_time > RESPONSE_CACHE_TTL:
+        return None
+    return response
+
+
+def _cache_response(email: str, end_point_path: str, response: Response) -> None:
+    with RESPONSE_CACHE_LOCK:
+        key = (email, end_point_path)
+        RESPONSE_CACHE[key] = (time.monotonic(), response)
+        RESPONSE_CACHE.move_to_end(key)
+        while len(RESPONSE_CACHE) > RESPONSE_CACHE_MAXSIZE:
+            RESPONSE_CACHE.popitem(last=False)
+
+
+def _invalidate_cached_responses(email: str, end_point_path: str) -> None:
+    """Forget the cached responses for the given user from the same part of the API as
+    the given end point, e.g. all the /sensor/ end points for /sensor/insert-sensor.
+    """
+    prefix = end_point_path[: end_point_path.find("/", 1) + 1]
+    with RESPONSE_CACHE_LOCK:
+        stale_keys = [
+            key
+            for key in RESPONSE_CACHE
+            if key[0] == email and key[1].startswith(prefix)
+        ]
+        for key in stale_keys:
+            del RESPONSE_CACHE[key]
+
+
+def clear_response_cache() -> None:
+    """Forget all cached responses from the backend."""
+    with RESPONSE_CACHE_LOCK:
+        RESPONSE_CACHE.clear()
+
+
+def _is_read_only(request_type: str, end_point_path: str) -> bool:
+    """Return True if the given backend call can't change any data."""
+    if request_type == "get" or end_point_path in READ_ONLY_END_POINTS:
+        return True
+    name = end_point_path.rsplit("/", 1)[-1]
+    return name.startswith(READ_ONLY_NAME_PREFIXES)
 
 
 class User(UserMixin):
@@ -20,18 +99,44 @@ class User(UserMixin):
         self.email = email
         self.access_token = None
         self.refresh_token = None
-        ALL_USERS[email] = self
+        # The headers for authenticating with the access token, kept so that they don't
+        # need to be rebuilt for every backend call.
+        self._auth_headers = None
+
+    def _set_tokens(
+        self: "User", access_token: Optional[str], refresh_token: Optional[str]
+    ) -> None:
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        if access_token is None:
+            self._auth_headers = None
+        else:
+            self._auth_headers = {"Authorization": f"Bearer {access_token}"}
 
     def get_id(self: "User") -> str:
         return self.email
 
     @staticmethod
     def get(email: str) -> "User":
-        if email in ALL_USERS:
-            user = ALL_USERS[email]
-        else:
-            user = User(email)
-        return user
+        """Get the user with the given email.
+
+        If the user hasn't authenticated, or has been forgotten since, return a new,
+        unauthenticated user.
+        """
+        with ALL_USERS_LOCK:
+            user = ALL_USERS.get(email)
+            if user is not None:
+                ALL_USERS.move_to_end(email)
+                return user
+        return User(email)
+
+    def _remember(self: "User") -> None:
+        """Add this user to ALL_USERS, so that User.get can find it."""
+        with ALL_USERS_LOCK:
+            ALL_USERS[self.email] = self
+            ALL_USERS.move_to_end(self.email)
+            while len(ALL_USERS) > MAX_USERS:
+                ALL_USERS.popitem(last=False)
 
     def authenticate(self: "User", password: str) -> None:
         response = backend_call(
@@ -39,11 +144,12 @@ class User(UserMixin):
         )
         if response.status_code != 200:
             raise exc.AuthorizationError("Invalid credentials.")
+        body = response.json()
         try:
-            self.access_token = response.json()["access_token"]
-            self.refresh_token = response.json()["refresh_token"]
+            self._set_tokens(body["access_token"], body["refresh_token"])
         except KeyError:
             raise exc.BackendApiError("Malformed response from /auth/login")
+        self._remember()
 
     def refresh(self: "User") -> None:
         response = backend_call(
@@ -52,12 +158,11 @@ class User(UserMixin):
             headers={"Authorization": f"Bearer {self.refresh_token}"},
         )
         if response.status_code != 200:
-            self.access_token = None
-            self.refresh_token = None
+            self._set_tokens(None, None)
             raise exc.AuthorizationError("Invalid refresh token.")
+        body = response.json()
         try:
-            self.access_token = response.json()["access_token"]
-            self.refresh_token = response.json()["refresh_token"]
+            self._set_tokens(body["access_token"], body["refresh_token"])
         except KeyError:
             raise exc.BackendApiError("Malformed response from /auth/refresh")
 
@@ -72,27 +177,58 @@ class User(UserMixin):
         payload: Optional[dict] = None,
         headers: Optional[dict] = None,
     ) -> Response:
-        headers = {} if headers is None else headers
+        """Make an authenticated call to the backend.
+
+        Responses to GET requests without a payload or extra headers are cached for a
+        short while, see RESPONSE_CACHE_TTL. A call that may change data, such as
+        /sensor/insert-sensor, clears this user's cached responses from the same part of
+        the API, e.g. all of /sensor/.
+        """
         if not self.is_authenticated:
             raise exc.AuthorizationError(
                 "An unautheticated user tried to make a backend call to "
                 f"{end_point_path}"
             )
+        is_cacheable = request_type == "get" and not payload and not headers
+        if is_cacheable:
+            cached_response = _get_cached_response(self.email, end_point_path)
+            if cached_response is not None:
+                return cached_response
+        elif not _is_read_only(request_type, end_point_path):
+            _invalidate_cached_responses(self.email, end_point_path)
         response = backend_call(
             request_type,
             end_point_path,
             payload=payload,
-            headers=headers | {"Authorization": f"Bearer {self.access_token}"},
+            headers=self._merge_auth_headers(headers),
         )
         # If the access token has expired, refresh it and try again
-        if response.status_code == 401 and response.json == {
-            "msg": "Token has expired"
-        }:
+        if response.status_code == 401 and _is_token_expired_response(response):
             self.refresh()
             response = backend_call(
                 request_type,
                 end_point_path,
                 payload=payload,
-                headers=headers | {"Authorization": f"Bearer {self.access_token}"},
+                headers=self._merge_auth_headers(headers),
             )
+        if is_cacheable and response.status_code == 200:
+            _cache_response(self.email, end_point_path, response)
         return response
+
+    def _merge_auth_headers(self: "User", headers: Optional[dict]) -> dict:
+        """Add the authorization header to the given headers.
+
+        The returned dict may be shared, and must not be modified.
+        """
+        if not headers:
+            return self._auth_headers
+        return headers | self._auth_headers
+
+
+def _is_token_expired_response(response: Response) -> bool:
+    """Return True if the backend rejected a call because the access token expired."""
+    try:
+        body = response.json()
+    except JSONDecodeError:
+        return False
+    return body == {"detail": "Token has expired"}
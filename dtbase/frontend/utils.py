@@ -2,11 +2,26 @@
 import unicodedata
 import urllib
 from collections.abc import Collection
-from typing import Any, Dict, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
 from urllib.parse import urlparse
 
 from flask import Request
 
+# Thread pool for making a backend call while the thread handling a request makes
+# another one. A request should submit at most one call at a time, so that a few
+# simultaneous requests can't take up all the workers.
+BACKEND_CALL_EXECUTOR = ThreadPoolExecutor(max_workers=8)
+
+
+def submit_backend_call(func: Callable, *args: Any) -> Future:
+    """Call `func(*args)` in a background thread. Returns a Future for the result.
+
+    `func` runs outside of the request context, so it must not use e.g. `current_user`
+    or `session`. Pass it what it needs, such as the user object, as arguments.
+    """
+    return BACKEND_CALL_EXECUTOR.submit(func, *args)
+
 
 def parse_url_parameter(request: Request, parameter: str) -> Optional[str]:
     """Parse a URL parameter, doing any unquoting as necessary. Return None if the
@@ -20,6 +35,19 @@ def parse_url_parameter(request: Request, parameter: str) -> Optional[str]:
     return parsed
 
 
+def _convert_boolean(value: str) -> bool:
+    return value.lower() == "true"
+
+
+# Functions for converting form values to each datatype, keyed by the datatype name.
+CONVERSION_FUNCTIONS = {
+    "integer": int,
+    "float": float,
+    "string": str,
+    "boolean": _convert_boolean,
+}
+
+
 def convert_form_values(
     variables: List[Dict[str, Any]], form: dict, prefix: str = "identifier"
 ) -> Dict[str, Any]:
@@ -27,23 +55,23 @@ def convert_form_values(
     Prepared the form and converts values to their respective datatypes as defined in
     the schema. Returns a dictionary of converted values.
     """
-
-    # Define a dictionary mapping type names to conversion functions
-    conversion_functions = {
-        "integer": int,
-        "float": float,
-        "string": str,
-        "boolean": lambda x: x.lower() == "true",
-    }
-
     converted_values = {}
+    # Strip the prefix from the relevant form fields once, rather than building the
+    # field name for every variable.
+    full_prefix = f"{prefix}_"
+    prefix_length = len(full_prefix)
+    prefixed_values = {
+        key[prefix_length:]: value
+        for key, value in form.items()
+        if key.startswith(full_prefix)
+    }
 
     for variable in variables:
-        value = form.get(f"{prefix}_{variable['name']}")
+        value = prefixed_values.get(variable["name"])
         datatype = variable["datatype"]
 
         # Get the conversion function for this datatype
-        conversion_function = conversion_functions.get(datatype)
+        conversion_function = CONVERSION_FUNCTIONS.get(datatype)
 
         if not conversion_function:
             raise ValueError(
@@ -66,6 +94,10 @@ def convert_form_values(
 
 # The following two functions mimic similar ones from Django.
 
+# URL schemes considered safe for redirects, depending on whether HTTPS is required.
+HTTPS_SCHEMES = frozenset(("https",))
+HTTP_AND_HTTPS_SCHEMES = frozenset(("http", "https"))
+
 
 def url_has_allowed_host_and_scheme(
     url: Optional[str],
@@ -88,13 +120,29 @@ def url_has_allowed_host_and_scheme(
         allowed_hosts = set()
     elif isinstance(allowed_hosts, str):
         allowed_hosts = {allowed_hosts}
-    # Chrome treats \ completely as / in paths but it could be part of some
-    # basic auth credentials so we need to check both URLs.
-    return _url_has_allowed_host_and_scheme(
+    is_allowed = _url_has_allowed_host_and_scheme(
         url, allowed_hosts, require_https=require_https
-    ) and _url_has_allowed_host_and_scheme(
-        url.replace("\\", "/"), allowed_hosts, require_https=require_https
     )
+    # Chrome treats \ completely as / in paths but it could be part of some
+    # basic auth credentials so we need to check both URLs. Without any backslashes the
+    # two would be the same, so there's no need for the second check.
+    if is_allowed and "\\" in url:
+        is_allowed = _url_has_allowed_host_and_scheme(
+            url.replace("\\", "/"), allowed_hosts, require_https=require_https
+        )
+    return is_allowed
+
+
+def _is_control_character(char: str) -> bool:
+    """Return True if char is in one of the Unicode "Other" categories.
+
+    The only such ASCII characters are the C0 controls and DEL, so those are checked
+    for directly, and unicodedata is only consulted for non-ASCII characters.
+    """
+    code_point = ord(char)
+    if code_point < 0x80:
+        return code_point < 0x20 or code_point == 0x7F
+    return unicodedata.category(char)[0] == "C"
 
 
 def _url_has_allowed_host_and_scheme(
@@ -117,13 +165,13 @@ def _url_has_allowed_host_and_scheme(
     # Forbid URLs that start with control characters. Some browsers (like
     # Chrome) ignore quite a few control characters at the start of a
     # URL and might consider the URL as scheme relative.
-    if unicodedata.category(url[0])[0] == "C":
+    if _is_control_character(url[0]):
         return False
     scheme = url_info.scheme
     # Consider URLs without a scheme (e.g. //example.com/p) to be http.
     if not url_info.scheme and url_info.netloc:
         scheme = "http"
-    valid_schemes = ["https"] if require_https else ["http", "https"]
+    valid_schemes = HTTPS_SCHEMES if require_https else HTTP_AND_HTTPS_SCHEMES
     return (not url_info.netloc or url_info.netloc in allowed_hosts) and (
         not scheme or scheme in valid_schemes
     )
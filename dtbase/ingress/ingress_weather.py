@@ -266,34 +266,36 @@ class OpenWeatherDataIngress(BaseIngress):
             for dt in list(pd.date_range(dt_from, dt_to, freq="d").to_pydatetime())
         ]
 
-        # Loop through timestamps, make API call and extract hourly data from response
+        # Loop through timestamps, make API call and extract hourly data from response.
+        # The calls share a session, so that they can reuse the same connection.
         hourly_records = []
-        for ts in timestamps:
-            url = base_url + "&dt={}".format(ts)
-            response = requests.get(url)
-
-            if response.status_code != 200:
-                raise RuntimeError(
-                    f"Got an error response from the OpenWeatherMap API. {response}"
-                )
-
-            hourly_data = response.json()["hourly"]
-
-            # Reformat hourly data from API response into list of dicts
-            for hour in hourly_data:
-                record = {}
-                record["timestamp"] = datetime.fromtimestamp(hour["dt"])
-                record["temperature"] = hour["temp"]
-                record["air_pressure"] = hour["pressure"]
-                record["relative_humidity"] = hour["humidity"]
-                record["wind_speed"] = hour["wind_speed"]
-                record["wind_direction"] = hour["wind_deg"]
-                record["icon"] = hour["weather"][0]["icon"]
-                record["rain"] = 0.0
-
-                if "rain" in hour.keys():
-                    record["rain"] += hour["rain"]["1h"]
-                hourly_records.append(record)
+        with requests.Session() as session:
+            for ts in timestamps:
+                url = base_url + "&dt={}".format(ts)
+                response = session.get(url)
+
+                if response.status_code != 200:
+                    raise RuntimeError(
+                        f"Got an error response from the OpenWeatherMap API. {response}"
+                    )
+
+                hourly_data = response.json()["hourly"]
+
+                # Reformat hourly data from API response into list of dicts
+                for hour in hourly_data:
+                    record = {}
+                    record["timestamp"] = datetime.fromtimestamp(hour["dt"])
+                    record["temperature"] = hour["temp"]
+                    record["air_pressure"] = hour["pressure"]
+                    record["relative_humidity"] = hour["humidity"]
+                    record["wind_speed"] = hour["wind_speed"]
+                    record["wind_direction"] = hour["wind_deg"]
+                    record["icon"] = hour["weather"][0]["icon"]
+                    record["rain"] = 0.0
+
+                    if "rain" in hour.keys():
+                        record["rain"] += hour["rain"]["1h"]
+                    hourly_records.append(record)
 
         weather_df = pd.DataFrame(hourly_records)
         weather_df.set_index("timestamp", inplace=True)
@@ -1,6 +1,6 @@
 """The main Pulumi deployment script."""
 import hashlib
-from typing import Any, List
+from typing import Any, Iterable, List
 
 import pulumi_azure_native.dbforpostgresql as postgresql
 import pulumi_azure_native.insights as insights
@@ -24,6 +24,16 @@ FRONTEND_SECRET_KEY = CONFIG.require("frontend-secret-key")
 JWT_SECRET_KEY = CONFIG.require("jwt-secret-key")
 assert RESOURCE_NAME_PREFIX is not None
 
+# A (name, value) pair of an app setting for a web app.
+AppSetting = tuple[str, str | Output[str]]
+
+# App settings that are the same for all the web apps, which all run Docker containers.
+DOCKER_APP_SETTINGS = (
+    ("WEBSITES_ENABLE_APP_SERVICE_STORAGE", "false"),
+    ("DOCKER_REGISTRY_SERVER_URL", "https://index.docker.io/v1"),
+    ("DOCKER_ENABLE_CI", "true"),
+)
+
 
 def get_connection_string(account_name: str, resource_group_name: str) -> Output[str]:
     storage_account_keys = storage.list_storage_account_keys_output(
@@ -38,6 +48,29 @@ def get_connection_string(account_name: str, resource_group_name: str) -> Output
     return connection_string
 
 
+def make_app_insights_settings(
+    app_insights: insights.Component,
+) -> tuple[AppSetting, ...]:
+    """Return the app settings for connecting a web app to Application Insights.
+
+    The same settings are shared by all the web apps.
+    """
+    return (
+        ("APPINSIGHTS_INSTRUMENTATIONKEY", app_insights.instrumentation_key),
+        (
+            "APPLICATIONINSIGHTS_CONNECTION_STRING",
+            app_insights.instrumentation_key.apply(
+                lambda key: "InstrumentationKey=" + key
+            ),
+        ),
+    )
+
+
+def make_app_settings(settings: Iterable[AppSetting]) -> List[web.NameValuePairArgs]:
+    """Turn (name, value) pairs into app settings for a web app."""
+    return [web.NameValuePairArgs(name=name, value=value) for name, value in settings]
+
+
 def create_sql_server(resource_group: resource.ResourceGroup) -> postgresql.Server:
     sql_server_name = f"{RESOURCE_NAME_PREFIX}-postgresql"
     sql_server = postgresql.Server(
@@ -114,23 +147,16 @@ def create_backend_webapp(
     resource_group: resource.ResourceGroup,
     app_service_plan: Any,
     sql_server: postgresql.Server,
-    app_insights: insights.Component,
+    app_insights_settings: tuple[AppSetting, ...],
 ) -> web.WebApp:
-    _sql_host = Output.format("{0}.postgres.database.azure.com", sql_server.name)
-    webapp_settings = [
-        web.NameValuePairArgs(name=name, value=value)
-        for name, value in (
-            ("APPINSIGHTS_INSTRUMENTATIONKEY", app_insights.instrumentation_key),
-            (
-                "APPLICATIONINSIGHTS_CONNECTION_STRING",
-                app_insights.instrumentation_key.apply(
-                    lambda key: "InstrumentationKey=" + key
-                ),
-            ),
+    _sql_host = sql_server.name.apply(
+        lambda name: f"{name}.postgres.database.azure.com"
+    )
+    webapp_settings = make_app_settings(
+        (
+            *app_insights_settings,
             ("ApplicationInsightsAgent_EXTENSION_VERSION", "~2"),
-            ("WEBSITES_ENABLE_APP_SERVICE_STORAGE", "false"),
-            ("DOCKER_REGISTRY_SERVER_URL", "https://index.docker.io/v1"),
-            ("DOCKER_ENABLE_CI", "true"),
+            *DOCKER_APP_SETTINGS,
             ("DT_SQL_HOST", _sql_host),
             ("DT_SQL_PASS", SQL_SERVER_PASSWORD),
             ("DT_SQL_PORT", "5432"),
@@ -140,7 +166,7 @@ def create_backend_webapp(
             ("DT_JWT_SECRET_KEY", JWT_SECRET_KEY),
             ("WEBSITES_PORT", "5000"),
         )
-    ]
+    )
     webapp = web.WebApp(
         f"{RESOURCE_NAME_PREFIX}-{name}",
         resource_group_name=resource_group.name,
@@ -160,28 +186,19 @@ def create_frontend_webapp(
     name: str | Output[str],
     resource_group: resource.ResourceGroup,
     app_service_plan: Any,
-    app_insights: insights.Component,
+    app_insights_settings: tuple[AppSetting, ...],
     backend_url: str | Output[str],
 ) -> web.WebApp:
-    webapp_settings = [
-        web.NameValuePairArgs(name=name, value=value)
-        for name, value in (
-            ("APPINSIGHTS_INSTRUMENTATIONKEY", app_insights.instrumentation_key),
-            (
-                "APPLICATIONINSIGHTS_CONNECTION_STRING",
-                app_insights.instrumentation_key.apply(
-                    lambda key: "InstrumentationKey=" + key
-                ),
-            ),
+    webapp_settings = make_app_settings(
+        (
+            *app_insights_settings,
             ("ApplicationInsightsAgent_EXTENSION_VERSION", "~2"),
-            ("WEBSITES_ENABLE_APP_SERVICE_STORAGE", "false"),
-            ("DOCKER_REGISTRY_SERVER_URL", "https://index.docker.io/v1"),
-            ("DOCKER_ENABLE_CI", "true"),
+            *DOCKER_APP_SETTINGS,
             ("DT_BACKEND_URL", backend_url),
             ("DT_FRONT_SECRET_KEY", FRONTEND_SECRET_KEY),
             ("WEBSITES_PORT", "8000"),
         )
-    ]
+    )
     webapp = web.WebApp(
         f"{RESOURCE_NAME_PREFIX}-{name}",
         resource_group_name=resource_group.name,
@@ -201,31 +218,22 @@ def create_function_app(
     name: str | Output[str],
     resource_group: resource.ResourceGroup,
     app_service_plan: Any,
-    app_insights: insights.Component,
+    app_insights_settings: tuple[AppSetting, ...],
     sa_connection_string: str | Output[str],
     storage_account: storage.StorageAccount,
     backend_url: str | Output[str],
 ) -> web.WebApp:
-    webapp_settings = [
-        web.NameValuePairArgs(name=name, value=value)
-        for name, value in (
+    webapp_settings = make_app_settings(
+        (
             ("AzureWebJobsStorage", sa_connection_string),
             ("FUNCTIONS_EXTENSION_VERSION", "~4"),
-            ("APPINSIGHTS_INSTRUMENTATIONKEY", app_insights.instrumentation_key),
-            (
-                "APPLICATIONINSIGHTS_CONNECTION_STRING",
-                app_insights.instrumentation_key.apply(
-                    lambda key: "InstrumentationKey=" + key
-                ),
-            ),
-            ("WEBSITES_ENABLE_APP_SERVICE_STORAGE", "false"),
-            ("DOCKER_REGISTRY_SERVER_URL", "https://index.docker.io/v1"),
-            ("DOCKER_ENABLE_CI", "true"),
+            *app_insights_settings,
+            *DOCKER_APP_SETTINGS,
             ("DT_BACKEND_URL", backend_url),
             # TODO We should probably use a different user for the functions app.
             ("DT_DEFAULT_USER_PASS", f"{DEFAULT_USER_PASSWORD}"),
         )
-    ]
+    )
     models_app = web.WebApp(
         f"{RESOURCE_NAME_PREFIX}-{name}",
         resource_group_name=resource_group.name,
@@ -246,36 +254,47 @@ def create_function_app(
     return models_app
 
 
+def firewall_rule_name(ip: str, num_hash_chars: int) -> str:
+    """Return the name of the Postgres firewall rule for the given IP.
+
+    The name includes the start of the IP's SHA-256 hash, rather than the IP itself, to
+    not reveal the IP. The hash function must not change, since Pulumi knows existing
+    rules by these names, and would replace every rule if they changed.
+    """
+    h = hashlib.sha256(ip.encode("utf8")).hexdigest()[:num_hash_chars]
+    return f"{RESOURCE_NAME_PREFIX}-fwr{h}"
+
+
 def create_postgres_firewall_rules(
     resource_group: resource.ResourceGroup,
     sql_server: postgresql.Server,
     ips_string: str,
-    already_created: Any,
+    already_created: set[str],
     num_hash_chars: int = 4,
 ) -> List[postgresql.FirewallRule]:
     """Given a list of comma separated IP addresses, create a firewall rule for the
     Postgres server to allow each one of them.
 
-    We append a part of the IPs hash to the name, to create a unique name for the role.
-    We use the hash rather than the actual IP to not reveal actual IPs in the resource
-    names.
+    The rules are named using `firewall_rule_name`.
+
+    `already_created` is the set of IPs that already have a rule. It is updated with the
+    IPs for which rules are created.
     """
     rules = []
     for ip in ips_string.split(","):
         if ip in already_created:
             # Don't try to create another rule for this same IP, if it comes up again.
             continue
-        h = hashlib.sha256(bytes(ip, encoding="utf8")).hexdigest()[:num_hash_chars]
         rules.append(
             postgresql.FirewallRule(
-                f"{RESOURCE_NAME_PREFIX}-fwr{h}",
+                firewall_rule_name(ip, num_hash_chars),
                 resource_group_name=resource_group.name,
                 start_ip_address=ip,
                 end_ip_address=ip,
                 server_name=sql_server.name,
             )
         )
-        already_created.append(ip)
+        already_created.add(ip)
     return rules
 
 
@@ -285,33 +304,35 @@ def main() -> None:
     create_pg_database(resource_group, sql_server)
     app_service_plan = create_app_service_plan(resource_group)
     app_insights = create_app_insights(resource_group)
+    app_insights_settings = make_app_insights_settings(app_insights)
     storage_account = create_storage_account(resource_group)
     sa_connection_string = get_connection_string(
         storage_account.name, resource_group.name
     )
     backend = create_backend_webapp(
-        "backend", resource_group, app_service_plan, sql_server, app_insights
+        "backend", resource_group, app_service_plan, sql_server, app_insights_settings
     )
 
-    # Create firewall rules for allowing traffic for the PostgreSQL server. Using apply
-    # in this way explicitly breaks the Pulumi docs' warning that one shouldn't create
-    # new resources within apply. However, this is also how some officially Pulumi
-    # examples do it, and I don't know of another way. This means that `pulumi preview`
-    # doesn't work correctly though, it might not show the firewall rules, but the
-    # deployment does work out fine.
-    firewall_ips = []
-    backend.outbound_ip_addresses.apply(
-        lambda x: create_postgres_firewall_rules(
-            resource_group, sql_server, x, firewall_ips
-        )
-    )
+    # Create firewall rules for allowing traffic for the PostgreSQL server. The rules
+    # for the IPs from the config are created directly, so that they show up in
+    # `pulumi preview`. The backend's outbound IPs are only known once the backend
+    # exists, so their rules are created in a single apply, which skips any IPs that
+    # already have a rule. Using apply in this way explicitly breaks the Pulumi docs'
+    # warning that one shouldn't create new resources within apply. However, this is
+    # also how some officially Pulumi examples do it, and I don't know of another way.
+    # This means that `pulumi preview` doesn't work correctly though, it might not show
+    # the backend's firewall rules, but the deployment does work out fine.
+    firewall_ips: set[str] = set()
     if POSTGRES_ALLOWED_IPS is not None:
         create_postgres_firewall_rules(
             resource_group, sql_server, POSTGRES_ALLOWED_IPS, firewall_ips
         )
-    backend_url = backend.default_host_name.apply(
-        lambda endpoint: "https://" + endpoint
+    backend.outbound_ip_addresses.apply(
+        lambda x: create_postgres_firewall_rules(
+            resource_group, sql_server, x, firewall_ips
+        )
     )
+    backend_url = Output.concat("https://", backend.default_host_name)
     export(
         "backend_endpoint",
         backend_url,
@@ -321,7 +342,7 @@ def main() -> None:
         "functionapp",
         resource_group,
         app_service_plan,
-        app_insights,
+        app_insights_settings,
         sa_connection_string,
         storage_account,
         backend_url,
@@ -331,12 +352,10 @@ def main() -> None:
         "frontend",
         resource_group,
         app_service_plan,
-        app_insights,
+        app_insights_settings,
         backend_url,
     )
-    frontend_url = frontend.default_host_name.apply(
-        lambda endpoint: "https://" + endpoint
-    )
+    frontend_url = Output.concat("https://", frontend.default_host_name)
     export(
         "frontend_endpoint",
         frontend_url,
@@ -1,16 +1,18 @@
 """Configuration module for unit tests."""
+import datetime as dt
+import functools
 import os
 import re
+import socket
 import subprocess
 import time
-from html.parser import HTMLParser
 from typing import Any, Callable, Generator, Optional
 from unittest import mock
 from urllib.parse import urlparse
 
-import numpy as np
 import pytest
 import requests_mock
+import sqlalchemy as sqla
 import sqlalchemy_utils as sqla_utils
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
@@ -18,10 +20,14 @@ from flask import Flask
 from flask.testing import FlaskClient
 from httpx import Response as HTTPXResponse
 from requests.models import Response as RequestsResponse
+from requests.structures import CaseInsensitiveDict
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session, sessionmaker
 
+from dtbase.backend.auth import create_token_pair
+from dtbase.backend.create_app import add_default_user
 from dtbase.backend.create_app import create_app as create_backend_app
+from dtbase.backend.database.structure import Base
 from dtbase.backend.database.users import insert_user
 
 # The below import is for exporting, other modules will import it from there
@@ -36,15 +42,22 @@ from dtbase.core.constants import (
     DEFAULT_USER_PASS,
     SQL_TEST_CONNECTION_STRING,
     SQL_TEST_DBNAME,
+    SQL_TEST_HOST,
     SQL_TEST_PASSWORD,
+    SQL_TEST_PORT,
     SQL_TEST_USER,
 )
-from dtbase.frontend.app import create_app as create_frontend_app
-from dtbase.frontend.config import config_dict as frontend_config
+from dtbase.core.utils import BACKEND_METHODS
+from dtbase.frontend.user import clear_response_cache
 
-from .utils import TEST_USER_EMAIL, TEST_USER_PASSWORD, get_token
+from .utils import TEST_USER_EMAIL, TEST_USER_PASSWORD
 
-np.random.seed(42)
+# When the tests are run in parallel with pytest-xdist, each worker process uses a
+# database of its own, so that tests in different workers don't see each other's data.
+XDIST_WORKER = os.environ.get("PYTEST_XDIST_WORKER")
+TEST_DBNAME = (
+    SQL_TEST_DBNAME if XDIST_WORKER is None else f"{SQL_TEST_DBNAME}_{XDIST_WORKER}"
+)
 
 # # # # # #
 # Stuff for starting and stopping a docker container for the database.
@@ -52,6 +65,19 @@ np.random.seed(42)
 DOCKER_CONTAINER_ID: Optional[str] = None
 
 
+def postgres_is_reachable(timeout: float = 0.5) -> bool:
+    """Return True if something is listening on the test database's host and port."""
+    try:
+        address = (SQL_TEST_HOST, int(SQL_TEST_PORT))
+    except ValueError:
+        return False
+    try:
+        with socket.create_connection(address, timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
 def check_for_docker() -> str | bool:
     """
     See if we have a postgres docker container already running.
@@ -116,36 +142,63 @@ def start_docker_postgres(
             print("Problem starting Docker container - is Docker running?")
             return
         else:
-            # wait a while for the container to start up
-            time.sleep(10)
             # save the docker container id so we can stop it later
-            container_id = p.stdout.decode("utf-8")
+            container_id = p.stdout.decode("utf-8").strip()
+            if not wait_for_postgres(container_id, postgres_user):
+                print("Timed out waiting for the postgres docker container to start")
             return container_id
 
 
+def wait_for_postgres(
+    container_id: str, postgres_user: str, timeout: float = 30.0
+) -> bool:
+    """
+    Wait until the postgres server in the given container accepts connections.
+
+    The server is polled over TCP, since on its first start the container runs a
+    temporary server that only listens on a Unix socket, while it initialises the
+    database.
+
+    Returns:
+           True if the server is ready, False if it wasn't within `timeout` seconds.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        p = subprocess.run(
+            [
+                "docker",
+                "exec",
+                container_id,
+                "pg_isready",
+                "-h",
+                "127.0.0.1",
+                "-U",
+                postgres_user,
+            ],
+            capture_output=True,
+        )
+        if p.returncode == 0:
+            return True
+        time.sleep(0.2)
+    return False
+
+
 def stop_docker_postgres(container_id: str) -> None:
     """
     Stop the docker container with the specified container_id
     """
     if container_id:
         print(f"Stopping docker container {container_id}")
-        os.system("docker kill " + container_id)
+        subprocess.run(["docker", "kill", container_id], capture_output=True)
 
 
 # # # # # #
 # Stuff for getting the CSRF token from the frontend
 
 
-class CSRFTokenParser(HTMLParser):
-    """HTML parser that finds a CSRF token in a page."""
-
-    def handle_starttag(
-        self: "CSRFTokenParser", tag: str, attrs: list[tuple[str, str | None]]
-    ) -> None:
-        if tag == "input":
-            dict_attrs = dict(attrs)
-            if dict_attrs.get("id") == "csrf_token":
-                self.csrf_token = dict_attrs["value"]
+# Matches the hidden input with the CSRF token, capturing its value. WTForms renders
+# the attributes in alphabetical order, so id comes before value.
+CSRF_TOKEN_RE = re.compile(rb'<input[^>]*\bid="csrf_token"[^>]*\bvalue="([^"]*)"')
 
 
 def get_csrf_token(client: FlaskClient) -> str:
@@ -154,22 +207,33 @@ def get_csrf_token(client: FlaskClient) -> str:
     This is needed to be able to authenticate with the frontend.
     """
     response = client.get("/login")
-    parser = CSRFTokenParser()
-    parser.feed(response.data.decode())
-    token = parser.csrf_token
-    if token is None:
+    match = CSRF_TOKEN_RE.search(response.data)
+    if match is None:
         raise RuntimeError("Failed to extract CSRF token")
-    return token
+    return match.group(1).decode()
 
 
 # # # # # #
 # Fixtures for the tests
 
 
+@functools.cache
+def truncate_tables_statement(engine: Engine) -> sqla.TextClause:
+    """Return a statement that empties all the tables, built once per engine."""
+    quote = engine.dialect.identifier_preparer.quote
+    table_names = ", ".join(quote(table.name) for table in Base.metadata.sorted_tables)
+    return sqla.text(f"TRUNCATE {table_names} RESTART IDENTITY CASCADE")
+
+
 def reset_tables(engine: Engine) -> None:
-    """Reset the database by dropping all tables and recreating them."""
-    drop_tables(engine)
-    create_tables(engine)
+    """Reset the database by emptying all tables.
+
+    All the tables are truncated in a single statement, which is much faster than
+    dropping and recreating them. The sequences for the id columns are restarted too,
+    so every test sees the same ids.
+    """
+    with engine.begin() as conn:
+        conn.execute(truncate_tables_statement(engine))
 
 
 @pytest.fixture(scope="session")
@@ -177,18 +241,26 @@ def engine() -> Generator[Engine, None, None]:
     """Pytest fixture for a database engine.
 
     This fixture is session-scoped, meaning that it is created once and shared across
-    all tests.
+    all tests. The tables are recreated once, at the start of the session, so that
+    they match the current schema. After that, tests only empty them.
     """
-    engine = connect_db(SQL_TEST_CONNECTION_STRING, SQL_TEST_DBNAME)
-    with mock.patch("dtbase.backend.database.utils.DB_ENGINE", wraps=engine):
+    engine = connect_db(SQL_TEST_CONNECTION_STRING, TEST_DBNAME)
+    # Recreate the tables in one transaction. Having just dropped them, there's no need
+    # to check whether each one exists before creating it.
+    with engine.begin() as conn:
+        drop_tables(conn)
+        create_tables(conn, checkfirst=False)
+    with mock.patch("dtbase.backend.database.utils.DB_ENGINE", new=engine):
         yield engine
+    # Close the pooled connections, so that the database can be dropped at the end.
+    engine.dispose()
 
 
 @pytest.fixture(scope="session")
 def session_maker(engine: Engine) -> Generator[sessionmaker, None, None]:
     session_maker = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     with mock.patch(
-        "dtbase.backend.database.utils.DB_SESSION_MAKER", wraps=session_maker
+        "dtbase.backend.database.utils.DB_SESSION_MAKER", new=session_maker
     ):
         yield session_maker
 
@@ -209,24 +281,43 @@ def session(
         reset_tables(engine)
 
 
-@pytest.fixture()
-def app(engine: Engine) -> Generator[FastAPI, None, None]:
+@pytest.fixture(scope="session")
+def app(engine: Engine) -> FastAPI:
     """Pytest fixture for a backend app.
 
-    Cleans up the database after finishing.
+    This fixture is session-scoped, since the app holds no state of its own between
+    requests. The state lives in the database, which the client fixture resets.
     """
-    app = create_backend_app()
-    yield app
-    reset_tables(engine)
+    return create_backend_app()
 
 
-@pytest.fixture()
-def client(app: FastAPI) -> Generator[TestClient, None, None]:
-    """Pytest fixture for a client for the backend app."""
+@pytest.fixture(scope="session")
+def shared_client(app: FastAPI) -> Generator[TestClient, None, None]:
+    """Pytest fixture for a client for the backend app, shared by the whole session.
+
+    Tests should use the client fixture instead, which resets the database and the
+    client's state between tests.
+    """
     with TestClient(app) as client:
         yield client
 
 
+@pytest.fixture()
+def client(
+    app: FastAPI, engine: Engine, shared_client: TestClient
+) -> Generator[TestClient, None, None]:
+    """Pytest fixture for a client for the backend app.
+
+    Makes sure that the default user exists, and cleans up the database after
+    finishing.
+    """
+    add_default_user(app)
+    yield shared_client
+    shared_client.headers.pop("Authorization", None)
+    shared_client.cookies.clear()
+    reset_tables(engine)
+
+
 @pytest.fixture()
 def test_user(session: Session) -> None:
     """Pytest fixture that ensures that there is a test user in the database."""
@@ -238,16 +329,25 @@ def test_user(session: Session) -> None:
         raise e
 
 
+@pytest.fixture(scope="session")
+def auth_token() -> str:
+    """Pytest fixture for an access token for the test user.
+
+    The token is created once per session, rather than by logging in for every test,
+    which would check the password each time. It expires well after the tests finish.
+    """
+    with mock.patch(
+        "dtbase.backend.auth.JWT_ACCESS_TOKEN_EXPIRES", dt.timedelta(days=1)
+    ):
+        return create_token_pair(TEST_USER_EMAIL).access_token
+
+
 @pytest.fixture()
-def auth_client(client: TestClient, test_user: None) -> TestClient:
+def auth_client(client: TestClient, test_user: None, auth_token: str) -> TestClient:
     """Pytest fixture for a client for the backend app that is authenticated, and uses
     its credentials in all requests it makes.
     """
-    response = get_token(client)
-    if response.status_code != 200 or response.json is None:
-        raise RuntimeError("Failed to authenticate test client.")
-    token = response.json()["access_token"]
-    client.headers = {"Authorization": f"Bearer {token}"}
+    client.headers["Authorization"] = f"Bearer {auth_token}"
     return client
 
 
@@ -256,10 +356,22 @@ def httpx_to_requests_response(httpx_response: HTTPXResponse) -> RequestsRespons
     response = RequestsResponse()
     response.status_code = httpx_response.status_code
     response._content = httpx_response.content
-    response.headers = {**httpx_response.headers}
+    # Iterating over the items reads each header once, whereas copying the Headers
+    # object as a mapping would look up every key in it separately.
+    response.headers = CaseInsensitiveDict(httpx_response.headers.items())
+    # Without an encoding, requests would guess one from the content, which is slow.
+    response.encoding = httpx_response.encoding
     return response
 
 
+@functools.lru_cache(maxsize=256)
+def url_path(url: str) -> str:
+    """Return the path of a URL. The tests call the same few URLs over and over, so the
+    results are cached.
+    """
+    return urlparse(url).path
+
+
 def mock_request_method_builder(
     client: TestClient, method_name: str
 ) -> Callable[..., RequestsResponse]:
@@ -268,25 +380,74 @@ def mock_request_method_builder(
     `method_name` can be e.g. `"get"` or `"post"`
 
     The functions returned by this function can be used to make a mocked version of
-    requests to reroute any class made to e.g. `requests.get` to a Flask app directly.
+    a requests session to reroute any call made to e.g. `session.get` to a FastAPI app
+    directly.
     """
     request_func = getattr(client, method_name)
 
     def method(url: str, *args: Any, **kwargs: Any) -> RequestsResponse:
-        endpoint = urlparse(url).path
+        endpoint = url_path(url)
+        # httpx takes timeouts in a different form, and they are of no use when calling
+        # the app directly.
+        kwargs.pop("timeout", None)
         response = httpx_to_requests_response(request_func(endpoint, *args, **kwargs))
         return response
 
     return method
 
 
-@pytest.fixture()
+def mock_backend_methods(
+    client: TestClient,
+) -> dict[str, Callable[..., RequestsResponse]]:
+    """Return a dict like dtbase.core.utils.BACKEND_METHODS, but with methods that
+    send the requests to the TestClient `client`.
+    """
+    return {
+        method_name: mock_request_method_builder(client, method_name)
+        for method_name in BACKEND_METHODS
+    }
+
+
+@pytest.fixture(scope="session")
+def backend_methods(
+    shared_client: TestClient,
+) -> dict[str, Callable[..., RequestsResponse]]:
+    """Pytest fixture for the methods that conn_backend puts in BACKEND_METHODS.
+
+    They only depend on the session-wide backend client, so they are built once.
+    """
+    return mock_backend_methods(shared_client)
+
+
+@pytest.fixture(autouse=True)
+def fresh_response_cache() -> Generator[None, None, None]:
+    """Pytest fixture that makes sure the frontend's cache of backend responses doesn't
+    carry over from one test to another.
+    """
+    clear_response_cache()
+    yield
+    clear_response_cache()
+
+
+@pytest.fixture(scope="session")
 def frontend_app() -> Flask:
-    """Pytest fixture for a Flask app for the front end."""
+    """Pytest fixture for a Flask app for the front end.
+
+    This fixture is session-scoped. Anything that is particular to a test, like being
+    logged in, lives in the test client.
+    """
+    # Imported here rather than at the top, so that runs of only the backend tests
+    # don't import the whole frontend app.
+    from dtbase.frontend.app import create_app as create_frontend_app
+    from dtbase.frontend.config import config_dict as frontend_config
+
     config = frontend_config["Test"]
     # This would usually be set by an environment variable, but for tests we hardcode
     # it.
     config.SECRET_KEY = "the world's third worst kept secret"
+    # The CSRF token is only fetched once per session, see csrf_session, so don't let
+    # it expire.
+    config.WTF_CSRF_TIME_LIMIT = None
     frontend_app = create_frontend_app(config)
     return frontend_app
 
@@ -297,8 +458,40 @@ def frontend_client(frontend_app: Flask) -> FlaskClient:
     return frontend_app.test_client()
 
 
+@pytest.fixture(scope="session")
+def csrf_session(frontend_app: Flask) -> tuple[str, str]:
+    """Pytest fixture for a CSRF token for the frontend, and the session cookie that it
+    belongs to.
+
+    The login page is only fetched once per session. Any client can then use the token,
+    by setting the cookie, see log_in.
+    """
+    client = frontend_app.test_client()
+    csrf_token = get_csrf_token(client)
+    session_cookie = client.get_cookie(frontend_app.config["SESSION_COOKIE_NAME"])
+    if session_cookie is None:
+        raise RuntimeError("Failed to get a session cookie")
+    return csrf_token, session_cookie.value
+
+
+def log_in(client: FlaskClient, csrf_session: tuple[str, str]) -> None:
+    """Log in to the frontend as the default user, using the CSRF token and session
+    cookie from the csrf_session fixture.
+    """
+    csrf_token, session_cookie = csrf_session
+    client.set_cookie(client.application.config["SESSION_COOKIE_NAME"], session_cookie)
+    payload = {
+        "email": DEFAULT_USER_EMAIL,
+        "password": DEFAULT_USER_PASS,
+        "csrf_token": csrf_token,
+    }
+    client.post("/login", data=payload)
+
+
 @pytest.fixture()
-def mock_auth_frontend_client(frontend_client: FlaskClient) -> FlaskClient:
+def mock_auth_frontend_client(
+    frontend_client: FlaskClient, csrf_session: tuple[str, str]
+) -> FlaskClient:
     """Pytest fixture for front end client that acts as if the user has logged in,
     although there is no backend to actually connect to.
     """
@@ -310,34 +503,18 @@ def mock_auth_frontend_client(frontend_client: FlaskClient) -> FlaskClient:
                 "refresh_token": "mock refresh token",
             },
         )
-        csrf_token = get_csrf_token(frontend_client)
-        payload = {
-            "email": DEFAULT_USER_EMAIL,
-            "password": DEFAULT_USER_PASS,
-            "csrf_token": csrf_token,
-        }
-        frontend_client.post("/login", data=payload)
+        log_in(frontend_client, csrf_session)
     return frontend_client
 
 
 @pytest.fixture()
-def conn_frontend_app(
-    frontend_app: Flask, client: TestClient
-) -> Generator[Flask, None, None]:
+def conn_frontend_app(frontend_app: Flask, conn_backend: TestClient) -> Flask:
     """Pytest fixture for a frontend Flask app that is connected to a backend.
 
     This fixture also spins up a testing backend and routes any calls made through
-    `requests` to this backend.
+    `requests` to this backend, using the conn_backend fixture.
     """
-    mock_requests = mock.MagicMock()
-    for method_name in ("get", "post", "put", "delete"):
-        mock_method = mock_request_method_builder(client, method_name)
-        setattr(mock_requests, method_name, mock_method)
-
-    with mock.patch("dtbase.core.utils.requests", wraps=mock_requests):
-        config = frontend_config["Test"]
-        frontend_app = create_frontend_app(config)
-        yield frontend_app
+    return frontend_app
 
 
 @pytest.fixture()
@@ -347,37 +524,29 @@ def conn_frontend_client(conn_frontend_app: Flask) -> FlaskClient:
 
 
 @pytest.fixture()
-def auth_frontend_client(conn_frontend_client: FlaskClient) -> FlaskClient:
+def auth_frontend_client(
+    conn_frontend_client: FlaskClient, csrf_session: tuple[str, str]
+) -> FlaskClient:
     """Pytest fixture for a client for a frontend that is a connected to a backend and
     with the user logged in.
     """
-    csrf_token = get_csrf_token(conn_frontend_client)
-    payload = {
-        "email": DEFAULT_USER_EMAIL,
-        "password": DEFAULT_USER_PASS,
-        "csrf_token": csrf_token,
-    }
-    conn_frontend_client.post("/login", data=payload)
+    log_in(conn_frontend_client, csrf_session)
     return conn_frontend_client
 
 
 @pytest.fixture()
 def conn_backend(
     client: TestClient,
+    backend_methods: dict[str, Callable[..., RequestsResponse]],
 ) -> Generator[TestClient, None, None]:
     """Pytest fixture setting up a backend and making core.utils.backend_call talk to it
 
-    This works by mocking dtbase.models.utils.backend_call.requests with an object that
-    reroutes all calls to a test backend client.
+    This works by replacing the methods in dtbase.core.utils.BACKEND_METHODS with ones
+    that reroute all calls to a test backend client.
 
     `yields` the backend client.
     """
-    mock_requests = mock.MagicMock()
-    for method_name in ("get", "post", "put", "delete"):
-        mock_method = mock_request_method_builder(client, method_name)
-        setattr(mock_requests, method_name, mock_method)
-
-    with mock.patch("dtbase.core.utils.requests", wraps=mock_requests):
+    with mock.patch.dict(BACKEND_METHODS, backend_methods):
         yield client
 
 
@@ -389,24 +558,27 @@ def pytest_configure() -> None:
     """
     # move on with the rest of the setup
     global DOCKER_CONTAINER_ID
-    DOCKER_CONTAINER_ID = start_docker_postgres(
-        postgres_user=SQL_TEST_USER,
-        postgres_password=SQL_TEST_PASSWORD,
-    )
+    # With pytest-xdist, the main process is configured before it starts the workers,
+    # so only it needs to start the database container. If a database server is already
+    # running, e.g. in CI, there's no need for one.
+    if XDIST_WORKER is None and not postgres_is_reachable():
+        DOCKER_CONTAINER_ID = start_docker_postgres(
+            postgres_user=SQL_TEST_USER,
+            postgres_password=SQL_TEST_PASSWORD,
+        )
     if DOCKER_CONTAINER_ID:
         print(f"Setting DOCKER_CONTAINER_ID to {DOCKER_CONTAINER_ID}")
     # create database so that we have tables ready
-    conn_string = "{}/{}".format(SQL_TEST_CONNECTION_STRING, SQL_TEST_DBNAME)
+    conn_string = "{}/{}".format(SQL_TEST_CONNECTION_STRING, TEST_DBNAME)
     if not sqla_utils.database_exists(conn_string):
         sqla_utils.create_database(conn_string)
-    time.sleep(1)
 
 
 def pytest_unconfigure() -> None:
     """
     called before test process is exited.
     """
-    drop_db(SQL_TEST_CONNECTION_STRING, SQL_TEST_DBNAME)
+    drop_db(SQL_TEST_CONNECTION_STRING, TEST_DBNAME)
     # if we started a docker container in pytest_configure, kill it here.
     if DOCKER_CONTAINER_ID:
         stop_docker_postgres(DOCKER_CONTAINER_ID)
@@ -23,9 +23,8 @@ def test_get_token(client: TestClient, test_user: None) -> None:
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
 def test_get_token_nonexistent(client: TestClient) -> None:
     """Test getting an authetication token for a non-existent test user."""
-    with client:
-        response = get_token(client, email="snoopy@dogg.land", password="whatsmyname?")
-        assert response.status_code == 401
+    response = get_token(client, email="snoopy@dogg.land", password="whatsmyname?")
+    assert response.status_code == 401
 
 
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
@@ -2,63 +2,83 @@
 Test API endpoints for locations
 """
 import pytest
-from fastapi import FastAPI
 from fastapi.testclient import TestClient
-from starlette.routing import Route
 
 from .conftest import check_for_docker
-from .utils import assert_unauthorized
 
 DOCKER_RUNNING = check_for_docker()
 
-
-@pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
-def test_insert_location_schema(auth_client: TestClient) -> None:
-    schema = {
-        "name": "building-floor-room",
-        "description": "Find something within a building",
-        "identifiers": [
-            {"name": "building", "units": None, "datatype": "string"},
-            {"name": "floor", "units": None, "datatype": "integer"},
-            {"name": "room", "units": None, "datatype": "string"},
-        ],
-    }
-    response = auth_client.post("/location/insert-location-schema", json=schema)
-    assert response.status_code == 201
+# Schemas and locations used by several of the tests. The tests must not modify them.
+BUILDING_SCHEMA = {
+    "name": "building-floor-room",
+    "description": "Find something within a building",
+    "identifiers": [
+        {"name": "building", "units": None, "datatype": "string"},
+        {"name": "floor", "units": None, "datatype": "integer"},
+        {"name": "room", "units": None, "datatype": "string"},
+    ],
+}
+XY_SCHEMA = {
+    "name": "xy",
+    "description": "x-y coordinates in mm",
+    "identifiers": [
+        {"name": "x", "units": "mm", "datatype": "float"},
+        {"name": "y", "units": "mm", "datatype": "float"},
+    ],
+}
+XY_LOCATION = {"coordinates": {"x": 123.4, "y": 432.1}, "schema_name": "xy"}
+XYZ_LOCATION = {
+    "identifiers": [
+        {"name": "x_distance", "units": "m", "datatype": "float"},
+        {"name": "y_distance", "units": "m", "datatype": "float"},
+        {"name": "z_distance", "units": "m", "datatype": "float"},
+    ],
+    "values": [5.0, 0.1, 4.4],
+}
+TEST_SCHEMA_1 = {
+    "name": "test-schema1",
+    "description": "Test schema 1",
+    "identifiers": [
+        {"name": "test1", "units": None, "datatype": "string"},
+        {"name": "test2", "units": None, "datatype": "integer"},
+    ],
+}
+TEST_SCHEMA_2 = {
+    "name": "test-schema2",
+    "description": "Test schema 2",
+    "identifiers": [
+        {"name": "test3", "units": None, "datatype": "string"},
+        {"name": "test4", "units": None, "datatype": "integer"},
+    ],
+}
+# Inserting the same thing once should succeed, inserting it again should conflict.
+INSERT_TIMES_EXPECTED = [(1, 201), (2, 409)]
 
 
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
-def test_insert_location_schema_duplicate(auth_client: TestClient) -> None:
-    schema = {
-        "name": "building-floor-room",
-        "description": "Find something within a building",
-        "identifiers": [
-            {"name": "building", "units": None, "datatype": "string"},
-            {"name": "floor", "units": None, "datatype": "integer"},
-            {"name": "room", "units": None, "datatype": "string"},
-        ],
-    }
-    response = auth_client.post("/location/insert-location-schema", json=schema)
-    assert response.status_code == 201
-    response = auth_client.post("/location/insert-location-schema", json=schema)
-    assert response.status_code == 409
+@pytest.mark.parametrize("times, expected", INSERT_TIMES_EXPECTED)
+def test_insert_location_schema(
+    auth_client: TestClient, times: int, expected: int
+) -> None:
+    for _ in range(times - 1):
+        response = auth_client.post(
+            "/location/insert-location-schema", json=BUILDING_SCHEMA
+        )
+        assert response.status_code == 201
+    response = auth_client.post(
+        "/location/insert-location-schema", json=BUILDING_SCHEMA
+    )
+    assert response.status_code == expected
 
 
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
 def test_get_location_schema_details(auth_client: TestClient) -> None:
-    schema = {
-        "name": "building-floor-room",
-        "description": "Find something within a building",
-        "identifiers": [
-            {"name": "building", "units": None, "datatype": "string"},
-            {"name": "floor", "units": None, "datatype": "integer"},
-            {"name": "room", "units": None, "datatype": "string"},
-        ],
-    }
-    response = auth_client.post("/location/insert-location-schema", json=schema)
+    response = auth_client.post(
+        "/location/insert-location-schema", json=BUILDING_SCHEMA
+    )
     assert response.status_code == 201
     response = auth_client.post(
-        "/location/get-schema-details", json={"schema_name": schema["name"]}
+        "/location/get-schema-details", json={"schema_name": BUILDING_SCHEMA["name"]}
     )
     assert response.status_code == 200
     body = response.json()
@@ -81,35 +101,15 @@ def test_get_nonexistent_location_schema_details(
 
 
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
-def test_insert_location_no_schema(auth_client: TestClient) -> None:
-    location = {
-        "identifiers": [
-            {"name": "x_distance", "units": "m", "datatype": "float"},
-            {"name": "y_distance", "units": "m", "datatype": "float"},
-            {"name": "z_distance", "units": "m", "datatype": "float"},
-        ],
-        "values": [5.0, 0.1, 4.4],
-    }
-
-    response = auth_client.post("/location/insert-location", json=location)
-    assert response.status_code == 201
-
-
-@pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
-def test_insert_location_no_schema_duplicate(auth_client: TestClient) -> None:
-    location = {
-        "identifiers": [
-            {"name": "x_distance", "units": "m", "datatype": "float"},
-            {"name": "y_distance", "units": "m", "datatype": "float"},
-            {"name": "z_distance", "units": "m", "datatype": "float"},
-        ],
-        "values": [5.0, 0.1, 4.4],
-    }
-
-    response = auth_client.post("/location/insert-location", json=location)
-    assert response.status_code == 201
-    response = auth_client.post("/location/insert-location", json=location)
-    assert response.status_code == 409
+@pytest.mark.parametrize("times, expected", INSERT_TIMES_EXPECTED)
+def test_insert_location_no_schema(
+    auth_client: TestClient, times: int, expected: int
+) -> None:
+    for _ in range(times - 1):
+        response = auth_client.post("/location/insert-location", json=XYZ_LOCATION)
+        assert response.status_code == 201
+    response = auth_client.post("/location/insert-location", json=XYZ_LOCATION)
+    assert response.status_code == expected
 
 
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
@@ -121,44 +121,23 @@ def test_insert_location_nonexisting_schema(auth_client: TestClient) -> None:
 
 
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
-def test_insert_location_existing_schema(auth_client: TestClient) -> None:
-    schema = {
-        "name": "xy",
-        "description": "x-y coordinates in mm",
-        "identifiers": [
-            {"name": "x", "units": "mm", "datatype": "float"},
-            {"name": "y", "units": "mm", "datatype": "float"},
-        ],
-    }
-    response = auth_client.post("/location/insert-location-schema", json=schema)
-    assert response.status_code == 201
-
-    # now use that schema to insert a location
-    location = {"coordinates": {"x": 123.4, "y": 432.1}, "schema_name": "xy"}
-    response = auth_client.post("/location/insert-location-for-schema", json=location)
-    assert response.status_code == 201
-
-
-@pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
-def test_insert_location_existing_schema_duplicate(
-    auth_client: TestClient,
+@pytest.mark.parametrize("times, expected", INSERT_TIMES_EXPECTED)
+def test_insert_location_existing_schema(
+    auth_client: TestClient, times: int, expected: int
 ) -> None:
-    schema = {
-        "name": "xy",
-        "description": "x-y coordinates in mm",
-        "identifiers": [
-            {"name": "x", "units": "mm", "datatype": "float"},
-            {"name": "y", "units": "mm", "datatype": "float"},
-        ],
-    }
-    response = auth_client.post("/location/insert-location-schema", json=schema)
+    response = auth_client.post("/location/insert-location-schema", json=XY_SCHEMA)
     assert response.status_code == 201
 
-    location = {"coordinates": {"x": 123.4, "y": 432.1}, "schema_name": "xy"}
-    response = auth_client.post("/location/insert-location-for-schema", json=location)
-    assert response.status_code == 201
-    response = auth_client.post("/location/insert-location-for-schema", json=location)
-    assert response.status_code == 409
+    # now use that schema to insert a location
+    for _ in range(times - 1):
+        response = auth_client.post(
+            "/location/insert-location-for-schema", json=XY_LOCATION
+        )
+        assert response.status_code == 201
+    response = auth_client.post(
+        "/location/insert-location-for-schema", json=XY_LOCATION
+    )
+    assert response.status_code == expected
 
 
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
@@ -171,24 +150,8 @@ def test_list_locations_no_coords(auth_client: TestClient) -> None:
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
 def test_list_location_identifiers(auth_client: TestClient) -> None:
     # Insert location schemas with unique identifiers
-    schema1 = {
-        "name": "test-schema1",
-        "description": "Test schema 1",
-        "identifiers": [
-            {"name": "test1", "units": None, "datatype": "string"},
-            {"name": "test2", "units": None, "datatype": "integer"},
-        ],
-    }
-    schema2 = {
-        "name": "test-schema2",
-        "description": "Test schema 2",
-        "identifiers": [
-            {"name": "test3", "units": None, "datatype": "string"},
-            {"name": "test4", "units": None, "datatype": "integer"},
-        ],
-    }
-    auth_client.post("/location/insert-location-schema", json=schema1)
-    auth_client.post("/location/insert-location-schema", json=schema2)
+    auth_client.post("/location/insert-location-schema", json=TEST_SCHEMA_1)
+    auth_client.post("/location/insert-location-schema", json=TEST_SCHEMA_2)
 
     # Test list_location_identifiers
     response = auth_client.get("/location/list-location-identifiers")
@@ -196,34 +159,18 @@ def test_list_location_identifiers(auth_client: TestClient) -> None:
 
     # Check if the inserted identifiers are in the response
     identifier_names = [identifier["name"] for identifier in response.json()]
-    for identifier in schema1["identifiers"]:
+    for identifier in TEST_SCHEMA_1["identifiers"]:
         assert identifier["name"] in identifier_names
 
-    for identifier in schema2["identifiers"]:
+    for identifier in TEST_SCHEMA_2["identifiers"]:
         assert identifier["name"] in identifier_names
 
 
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
 def test_list_location_schemas(auth_client: TestClient) -> None:
     # Insert location schemas
-    schema1 = {
-        "name": "test-schema1",
-        "description": "Test schema 1",
-        "identifiers": [
-            {"name": "test1", "units": None, "datatype": "string"},
-            {"name": "test2", "units": None, "datatype": "integer"},
-        ],
-    }
-    schema2 = {
-        "name": "test-schema2",
-        "description": "Test schema 2",
-        "identifiers": [
-            {"name": "test3", "units": None, "datatype": "string"},
-            {"name": "test4", "units": None, "datatype": "integer"},
-        ],
-    }
-    auth_client.post("/location/insert-location-schema", json=schema1)
-    auth_client.post("/location/insert-location-schema", json=schema2)
+    auth_client.post("/location/insert-location-schema", json=TEST_SCHEMA_1)
+    auth_client.post("/location/insert-location-schema", json=TEST_SCHEMA_2)
 
     # Test list_location_schemas
     response = auth_client.get("/location/list-location-schemas")
@@ -231,8 +178,8 @@ def test_list_location_schemas(auth_client: TestClient) -> None:
 
     # Check if the inserted schemas are in the response
     schema_names = [schema["name"] for schema in response.json()]
-    assert schema1["name"] in schema_names
-    assert schema2["name"] in schema_names
+    assert TEST_SCHEMA_1["name"] in schema_names
+    assert TEST_SCHEMA_2["name"] in schema_names
 
 
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
@@ -293,25 +240,3 @@ def test_delete_location(auth_client: TestClient) -> None:
     response = auth_client.post("/location/list-locations", json=location)
     assert response.status_code == 200
     assert len(response.json()) == 0
-
-
-@pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
-def test_unauthorized(client: TestClient, app: FastAPI) -> None:
-    """Check that we aren't able to access any of the end points if we don't have an
-    authorization token.
-
-    Note that this one, unlike all the others, uses the `client` rather than the
-    `auth_client` fixture.
-    """
-
-    for route in app.routes:
-        if not isinstance(route, Route):
-            # For some reason, FastAPI type-annotates app.routes as Sequence[BaseRoute],
-            # rather than Sequence[Route]. In case we ever encounter a router isn't a
-            # Route, raise an error.
-            raise ValueError(f"route {route} is not a Route")
-        methods = route.methods
-        if not methods or not route.path.startswith("/location"):
-            continue
-        for method in methods:
-            assert_unauthorized(client, method.lower(), route.path)
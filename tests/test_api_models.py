@@ -4,16 +4,12 @@ Test API endpoints for models
 import datetime as dt
 
 import pytest
-from dateutil.parser import parse
-from fastapi import FastAPI
 from fastapi.testclient import TestClient
 from httpx import Response
-from starlette.routing import Route
 
 from .conftest import check_for_docker
 from .test_api_sensors import UNIQ_ID1 as SENSOR_ID1
 from .test_api_sensors import insert_weather_sensor, insert_weather_type
-from .utils import assert_unauthorized
 
 DOCKER_RUNNING = check_for_docker()
 
@@ -99,6 +95,13 @@ RUN3 = {
 }
 
 
+def normalise_timestamp(timestamp: str) -> str:
+    """Normalise an ISO 8601 timestamp from the backend, so that a trailing Z and
+    +00:00 compare equal.
+    """
+    return dt.datetime.fromisoformat(timestamp.replace("Z", "+00:00")).isoformat()
+
+
 def insert_model(client: TestClient, name: str) -> None:
     response = client.post("/model/insert-model", json={"name": name})
     assert response.status_code == 201
@@ -156,8 +159,9 @@ def test_list_models(auth_client: TestClient) -> None:
     # list models
     response = auth_client.get("/model/list-models")
     assert response.status_code == 200
-    assert isinstance(response.json(), list)
-    assert len(response.json()) == 2
+    models = response.json()
+    assert isinstance(models, list)
+    assert len(models) == 2
 
 
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
@@ -172,8 +176,9 @@ def test_delete_model(auth_client: TestClient) -> None:
     # check that model was deleted
     response = auth_client.get("/model/list-models")
     assert response.status_code == 200
-    assert isinstance(response.json(), list)
-    assert len(response.json()) == 0
+    models = response.json()
+    assert isinstance(models, list)
+    assert len(models) == 0
 
 
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
@@ -201,8 +206,9 @@ def test_list_model_scenarios(auth_client: TestClient) -> None:
     # list model scenarios
     response = auth_client.get("/model/list-model-scenarios")
     assert response.status_code == 200
-    assert isinstance(response.json(), list)
-    assert len(response.json()) == 3
+    scenarios = response.json()
+    assert isinstance(scenarios, list)
+    assert len(scenarios) == 3
 
 
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
@@ -219,8 +225,9 @@ def test_delete_model_scenario(auth_client: TestClient) -> None:
     # check that model scenario was deleted
     response = auth_client.get("/model/list-model-scenarios")
     assert response.status_code == 200
-    assert isinstance(response.json(), list)
-    assert len(response.json()) == 2
+    scenarios = response.json()
+    assert isinstance(scenarios, list)
+    assert len(scenarios) == 2
 
 
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
@@ -240,8 +247,8 @@ def test_list_model_measures(auth_client: TestClient) -> None:
     assert response_data is not None
     assert len(response_data) == 2
     expected_keys = {"name", "units", "datatype"}
-    assert set(response_data[0].keys()) == expected_keys
-    assert set(response_data[1].keys()) == expected_keys
+    assert response_data[0].keys() == expected_keys
+    assert response_data[1].keys() == expected_keys
     for k, v in MEASURE1.items():
         assert response_data[0][k] == v
     for k, v in MEASURE2.items():
@@ -297,7 +304,7 @@ def test_list_model_runs(auth_client: TestClient) -> None:
         "sensor_measure",
     }
     run = body[0]
-    assert set(run.keys()) == expected_keys
+    assert run.keys() == expected_keys
     for k in ("model_name", "scenario_description"):
         assert run[k] == RUN1[k]
     for k in ("sensor_measure", "sensor_unique_id"):
@@ -315,10 +322,8 @@ def test_list_model_runs(auth_client: TestClient) -> None:
     assert len(body) == 2
     for run in body:
         if "time_created" in run:
-            # The conversion to and from isoformat is because of ambiguity in having a
-            # trailing Z vs +00:00.
-            run["time_created"] = parse(run["time_created"]).isoformat()
-        assert set(run.keys()) == expected_keys
+            run["time_created"] = normalise_timestamp(run["time_created"])
+        assert run.keys() == expected_keys
         expected_run = RUN1 if run["id"] == 1 else RUN2
         for k in expected_keys:
             if k in expected_run:
@@ -337,8 +342,9 @@ def test_get_model_run(auth_client: TestClient) -> None:
         "scenario": SCENARIO1,
     }
     response = auth_client.post("/model/list-model-runs", json=runs)
-    assert response.json() is not None
-    run_id = response.json()[0]["id"]
+    run_list = response.json()
+    assert run_list is not None
+    run_id = run_list[0]["id"]
 
     response = auth_client.post("/model/get-model-run", json={"run_id": run_id})
     assert response.status_code == 200
@@ -348,9 +354,7 @@ def test_get_model_run(auth_client: TestClient) -> None:
     key, value = next(iter(body.items()))
     for v in value:
         if "timestamp" in v:
-            # The conversion to and from isoformat is because of ambiguity in having a
-            # trailing Z vs +00:00.
-            v["timestamp"] = parse(v["timestamp"]).isoformat()
+            v["timestamp"] = normalise_timestamp(v["timestamp"])
     assert key in {MEASURE_NAME1, MEASURE_NAME2}
     if key == MEASURE_NAME1:
         expected_product = PRODUCT1
@@ -373,10 +377,11 @@ def test_get_model_run_sensor_measure(auth_client: TestClient) -> None:
     }
     response = auth_client.post("/model/list-model-runs", json=runs)
     assert response.status_code == 200
-    assert response.json() is not None
-    assert len(response.json()) == 2
+    run_list = response.json()
+    assert run_list is not None
+    assert len(run_list) == 2
 
-    for run in response.json():
+    for run in run_list:
         run_id = run["id"]
         response = auth_client.post(
             "/model/get-model-run-sensor-measure", json={"run_id": run_id}
@@ -384,34 +389,10 @@ def test_get_model_run_sensor_measure(auth_client: TestClient) -> None:
         assert response.status_code == 200
         body = response.json()
         assert body is not None
-        assert set(body.keys()) == {"sensor_unique_id", "sensor_measure"}
+        assert body.keys() == {"sensor_unique_id", "sensor_measure"}
         if run["scenario_description"] == SCENARIO2:
             assert body["sensor_unique_id"] == SENSOR_ID1
             assert body["sensor_measure"] == {"name": "temperature", "units": "Kelvin"}
         else:
             assert body["sensor_unique_id"] is None
             assert body["sensor_measure"] is None
-
-
-@pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
-def test_unauthorized(client: TestClient, app: FastAPI) -> None:
-    """Check that we aren't able to access any of the end points if we don't have an
-    authorization token.
-
-    Note that this one, unlike all the others, uses the `client` rather than the
-    `auth_client` fixture.
-    """
-
-    for route in app.routes:
-        if not isinstance(route, Route):
-            # For some reason, FastAPI type-annotates app.routes as Sequence[BaseRoute],
-            # rather than Sequence[Route]. In case we ever encounter a router isn't a
-            # Route, raise an error.
-            raise ValueError(f"route {route} is not a Route")
-        methods = route.methods
-        if methods is None:
-            continue
-        methods = iter(methods)
-        if methods and route.path.startswith("/model"):
-            method = next(methods)
-            assert_unauthorized(client, method.lower(), route.path)
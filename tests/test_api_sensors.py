@@ -2,13 +2,10 @@
 Test API endpoints for sensors
 """
 import pytest
-from fastapi import FastAPI
 from fastapi.testclient import TestClient
 from httpx import Response
-from starlette.routing import Route
 
 from .conftest import check_for_docker
-from .utils import assert_unauthorized
 
 DOCKER_RUNNING = check_for_docker()
 
@@ -49,11 +46,22 @@ def insert_weather_sensor(client: TestClient) -> Response:
     return response
 
 
-@pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
-def test_insert_sensor(auth_client: TestClient) -> None:
+@pytest.fixture()
+def weather_type(auth_client: TestClient) -> None:
+    """Pytest fixture that inserts the weather sensor type."""
     response = insert_weather_type(auth_client)
     assert response.status_code == 201
-    # Use that type to insert a sensor
+
+
+@pytest.fixture()
+def weather_sensor(auth_client: TestClient, weather_type: None) -> None:
+    """Pytest fixture that inserts a sensor of the weather type, with id UNIQ_ID1."""
+    response = insert_weather_sensor(auth_client)
+    assert response.status_code == 201
+
+
+@pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
+def test_insert_sensor(auth_client: TestClient, weather_type: None) -> None:
     response = insert_weather_sensor(auth_client)
     assert response.status_code == 201
 
@@ -91,9 +99,7 @@ def test_insert_two_sensor_types_sharing_measure(
 
 
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
-def test_list_sensors_of_a_type(auth_client: TestClient) -> None:
-    response = insert_weather_type(auth_client)
-    assert response.status_code == 201
+def test_list_sensors_of_a_type(auth_client: TestClient, weather_type: None) -> None:
     response = auth_client.post("/sensor/list-sensors", json={"type_name": "weather"})
     assert response.status_code == 200
     assert isinstance(response.json(), list)
@@ -140,18 +146,13 @@ def test_get_sensor_locations(auth_client: TestClient) -> None:
         json={"unique_identifier": UNIQ_ID1},
     )
     assert response.status_code == 200
-    assert response.json()[0]["x"] == X_COORD
-    assert response.json()[0]["y"] == Y_COORD
+    locations = response.json()
+    assert locations[0]["x"] == X_COORD
+    assert locations[0]["y"] == Y_COORD
 
 
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
-def test_insert_sensor_readings(auth_client: TestClient) -> None:
-    # Insert a sensor type and a sensor
-    response = insert_weather_type(auth_client)
-    assert response.status_code == 201
-    response = insert_weather_sensor(auth_client)
-    assert response.status_code == 201
-
+def test_insert_sensor_readings(auth_client: TestClient, weather_sensor: None) -> None:
     # Test the insert_sensor_readings API endpoint
     sensor_readings = {
         "measure_name": "temperature",
@@ -168,13 +169,7 @@ def test_insert_sensor_readings(auth_client: TestClient) -> None:
 
 
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
-def test_get_sensor_readings(auth_client: TestClient) -> None:
-    # Insert a sensor type and a sensor
-    response = insert_weather_type(auth_client)
-    assert response.status_code == 201
-    response = insert_weather_sensor(auth_client)
-    assert response.status_code == 201
-
+def test_get_sensor_readings(auth_client: TestClient, weather_sensor: None) -> None:
     # Insert sensor readings
     sensor_readings = {
         "measure_name": "temperature",
@@ -198,40 +193,33 @@ def test_get_sensor_readings(auth_client: TestClient) -> None:
     }
     response = auth_client.post("/sensor/sensor-readings", json=get_readings)
     assert response.status_code == 200
-    assert len(response.json()) == 3
-    for reading in response.json():
+    readings = response.json()
+    assert len(readings) == 3
+    for reading in readings:
         assert "value" in reading
         assert "timestamp" in reading
 
 
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
-def test_list_sensor_measures(auth_client: TestClient) -> None:
-    response = insert_weather_type(auth_client)
-    assert response.status_code == 201
-
+def test_list_sensor_measures(auth_client: TestClient, weather_type: None) -> None:
     response = auth_client.get("/sensor/list-measures")
     assert response.status_code == 200
-    assert isinstance(response.json(), list)
+    measures = response.json()
+    assert isinstance(measures, list)
+    assert {m["name"] for m in measures} == {"temperature", "is raining"}
 
 
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
-def test_list_sensor_types(auth_client: TestClient) -> None:
-    response = insert_weather_type(auth_client)
-    assert response.status_code == 201
-
+def test_list_sensor_types(auth_client: TestClient, weather_type: None) -> None:
     response = auth_client.get("/sensor/list-sensor-types")
     assert response.status_code == 200
-    assert isinstance(response.json(), list)
+    sensor_types = response.json()
+    assert isinstance(sensor_types, list)
+    assert [t["name"] for t in sensor_types] == ["weather"]
 
 
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
-def test_delete_sensor(auth_client: TestClient) -> None:
-    response = insert_weather_type(auth_client)
-    assert response.status_code == 201
-    # Use that type to insert a sensor
-    response = insert_weather_sensor(auth_client)
-    assert response.status_code == 201
-
+def test_delete_sensor(auth_client: TestClient, weather_sensor: None) -> None:
     response = auth_client.post(
         "/sensor/delete-sensor", json={"unique_identifier": UNIQ_ID1}
     )
@@ -239,9 +227,7 @@ def test_delete_sensor(auth_client: TestClient) -> None:
 
 
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
-def test_delete_sensor_type(auth_client: TestClient) -> None:
-    response = insert_weather_type(auth_client)
-    assert response.status_code == 201
+def test_delete_sensor_type(auth_client: TestClient, weather_type: None) -> None:
     response = auth_client.post(
         "/sensor/delete-sensor-type", json={"type_name": "weather"}
     )
@@ -249,13 +235,7 @@ def test_delete_sensor_type(auth_client: TestClient) -> None:
 
 
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
-def test_edit_sensor(auth_client: TestClient) -> None:
-    response = insert_weather_type(auth_client)
-    assert response.status_code == 201
-    # Use that type to insert a sensor
-    response = insert_weather_sensor(auth_client)
-    assert response.status_code == 201
-
+def test_edit_sensor(auth_client: TestClient, weather_sensor: None) -> None:
     response = auth_client.post(
         "/sensor/edit-sensor",
         json={"unique_identifier": UNIQ_ID1, "name": "new", "notes": "new"},
@@ -269,26 +249,3 @@ def test_edit_sensor(auth_client: TestClient) -> None:
         if sensor["unique_identifier"] == UNIQ_ID1:
             assert sensor["name"] == "new"
             assert sensor["notes"] == "new"
-
-
-@pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
-def test_unauthorized(client: TestClient, app: FastAPI) -> None:
-    """Check that we aren't able to access any of the end points if we don't have an
-    authorization token.
-
-    Note that this one, unlike all the others, uses the `client` rather than the
-    `auth_client` fixture.
-    """
-    for route in app.routes:
-        if not isinstance(route, Route):
-            # For some reason, FastAPI type-annotates app.routes as Sequence[BaseRoute],
-            # rather than Sequence[Route]. In case we ever encounter a router isn't a
-            # Route, raise an error.
-            raise ValueError(f"route {route} is not a Route")
-        methods = route.methods
-        if methods is None:
-            continue
-        methods = iter(methods)
-        if methods and route.path.startswith("/sensor"):
-            method = next(methods)
-            assert_unauthorized(client, method.lower(), route.path)
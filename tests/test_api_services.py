@@ -7,13 +7,10 @@ from unittest import mock
 import pytest
 import requests_mock
 from dateutil.parser import parse
-from fastapi import FastAPI
 from fastapi.testclient import TestClient
 from httpx import Response
-from starlette.routing import Route
 
 from .conftest import check_for_docker
-from .utils import assert_unauthorized
 
 DOCKER_RUNNING = check_for_docker()
 
@@ -331,24 +328,3 @@ def test_list_runs(auth_client: TestClient) -> None:
             and expected_run["parameter_set_name"] == NAMED_PARAMETERS1["name"]
         ):
             assert expected_run in response_json
-
-
-@pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
-def test_unauthorized(client: TestClient, app: FastAPI) -> None:
-    """Check that we aren't able to access any of the end points if we don't have an
-    authorization token.
-
-    Note that this one, unlike all the others, uses the `client` rather than the
-    `auth_client` fixture.
-    """
-    for route in app.routes:
-        if not isinstance(route, Route):
-            # For some reason, FastAPI type-annotates app.routes as Sequence[BaseRoute],
-            # rather than Sequence[Route]. In case we ever encounter a router isn't a
-            # Route, raise an error.
-            raise ValueError(f"route {route} is not a Route")
-        methods = route.methods
-        if not methods or not route.path.startswith("/service"):
-            continue
-        for method in methods:
-            assert_unauthorized(client, method.lower(), route.path)
@@ -0,0 +1,25 @@
+"""
+Test that the API end points can't be used without authenticating
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from .conftest import check_for_docker
+from .utils import assert_routes_unauthorized
+
+DOCKER_RUNNING = check_for_docker()
+
+
+@pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
+@pytest.mark.parametrize(
+    "prefix", ["/location", "/model", "/sensor", "/service", "/user"]
+)
+def test_unauthorized(client: TestClient, app: FastAPI, prefix: str) -> None:
+    """Check that we aren't able to access any of the end points under `prefix` if we
+    don't have an authorization token.
+
+    Note that this one, unlike most others, uses the `client` rather than the
+    `auth_client` fixture.
+    """
+    assert_routes_unauthorized(client, app, prefix)
@@ -114,6 +114,24 @@ def test_sensors_timeseries_with_data_mock(
             assert '<canvas id="HumidityCanvas"></canvas>' in html_content
 
 
+def test_sensors_timeseries_empty_readings_mock(
+    mock_auth_frontend_client: FlaskClient,
+) -> None:
+    with mock_auth_frontend_client as client:
+        with requests_mock.Mocker() as m:
+            m.get(
+                "http://localhost:5000/sensor/list-sensor-types", json=MOCK_SENSOR_TYPES
+            )
+            m.post("http://localhost:5000/sensor/list-sensors", json=MOCK_SENSORS)
+            m.post("http://localhost:5000/sensor/sensor-readings", json=[])
+            response = client.get(
+                "/sensors/time-series-plots?startDate=2023-01-01&endDate=2023-02-01&sensorIds=sensor1&sensorType=sensorType1"
+            )
+            assert response.status_code == 200
+            html_content = response.data.decode("utf-8")
+            assert '<canvas id="TemperatureCanvas"></canvas>' in html_content
+
+
 def test_sensors_readings_backend(auth_frontend_client: FlaskClient) -> None:
     with auth_frontend_client as client:
         response = client.get("/sensors/readings", follow_redirects=True)
@@ -182,6 +200,25 @@ def test_sensors_readings_post_sensor_mock(
             assert html_content.count("<tr>") == 6
 
 
+def test_sensors_readings_get_mock_cached(
+    mock_auth_frontend_client: FlaskClient,
+) -> None:
+    with mock_auth_frontend_client as client:
+        with requests_mock.Mocker() as m:
+            list_types = m.get(
+                "http://localhost:5000/sensor/list-sensor-types", json=MOCK_SENSOR_TYPES
+            )
+            list_sensors = m.post(
+                "http://localhost:5000/sensor/list-sensors", json=MOCK_SENSORS
+            )
+            client.get("/sensors/readings")
+            client.get("/sensors/readings")
+            # /sensor/list-sensors is a POST, but only reads data, so it shouldn't have
+            # cleared the cached list of sensor types.
+            assert list_sensors.call_count == 2
+            assert list_types.call_count == 1
+
+
 def test_add_sensor_type_backend(auth_frontend_client: FlaskClient) -> None:
     with auth_frontend_client as client:
         response = client.get("/sensors/add-sensor-type", follow_redirects=True)
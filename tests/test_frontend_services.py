@@ -69,3 +69,32 @@ def test_service_details_mock(mock_auth_frontend_client: FlaskClient) -> None:
             assert "paramset1" in html_content
             assert '"Hello"' in html_content
             assert "200 - OK" in html_content
+
+
+def test_services_index_expired_token_mock(
+    mock_auth_frontend_client: FlaskClient,
+) -> None:
+    """Check that an expired access token is refreshed, and the call retried."""
+    with mock_auth_frontend_client as client:
+        with requests_mock.Mocker() as m:
+            m.get(
+                "http://localhost:5000/service/list-services",
+                [
+                    {"json": {"detail": "Token has expired"}, "status_code": 401},
+                    {"json": MOCK_SERVICE_LIST, "status_code": 200},
+                ],
+            )
+            m.post(
+                "http://localhost:5000/auth/refresh",
+                json={
+                    "access_token": "new mock access token",
+                    "refresh_token": "new mock refresh token",
+                },
+            )
+            response = client.get("/services/index")
+            assert response.status_code == 200
+            assert "service1" in response.data.decode("utf-8")
+            assert (
+                m.last_request.headers["Authorization"]
+                == "Bearer new mock access token"
+            )
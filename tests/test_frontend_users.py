@@ -112,3 +112,25 @@ def test_users_index_post_mock_delete_user_fail(
             assert response.status_code == 200
             html_content = response.data.decode("utf-8")
             assert "Failed to delete user" in html_content
+
+
+def test_users_index_get_mock_cached(mock_auth_frontend_client: FlaskClient) -> None:
+    with mock_auth_frontend_client as client:
+        with requests_mock.Mocker() as m:
+            m.get("http://localhost:5000/user/list-users", json=["user1@example.com"])
+            m.post("http://localhost:5000/user/create-user", status_code=201)
+            client.get("/users/index")
+            client.get("/users/index")
+            # The second page load should reuse the list of users from the first.
+            assert m.call_count == 1
+            client.post(
+                "/users/index",
+                data={
+                    "email": "newuser@example.com",
+                    "password": "password",
+                    "submitNewUser": "",
+                },
+            )
+            # Creating a user should have cleared the cache, so the list of users is
+            # fetched again.
+            assert m.call_count == 3
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import pytest
 from fastapi.testclient import TestClient
@@ -19,6 +20,14 @@ from .upload_synthetic_data import insert_trh_readings
 DOCKER_RUNNING = check_for_docker()
 
 
+@pytest.fixture(autouse=True)
+def seed_random() -> None:
+    """Seed NumPy's random number generator, so that the synthetic data inserted by the
+    tests is the same on every run, whatever order the tests run in.
+    """
+    np.random.seed(42)
+
+
 @pytest.mark.skipif(not DOCKER_RUNNING, reason="requires docker")
 def test_arima_get_temperature(conn_backend: TestClient, session: Session) -> None:
     # Insert synthetic data into database
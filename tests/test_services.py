@@ -399,3 +399,28 @@ def test_list_runs(session: Session) -> None:
         assert expected_run2 in runs
         assert expected_run3 in runs
         assert expected_run4 in runs
+
+
+def test_list_runs_order_and_limit(session: Session) -> None:
+    """
+    Test that list_runs returns the most recent runs first, and respects the limit.
+    """
+    insert_parameter_sets(session)
+    times = [dt.datetime(2021, 1, day, tzinfo=dt.timezone.utc) for day in (2, 1, 3)]
+    with requests_mock.Mocker() as m, mock.patch(
+        "dtbase.backend.database.service.dt"
+    ) as mock_dt:
+        mock_dt.datetime.now.side_effect = times
+        m.post(SERVICE1_URL, json={"message": "Well hello there"})
+        for _ in times:
+            service.run_service(
+                service_name=SERVICE1_NAME,
+                parameter_set_name=SERVICE_PARAMETERS1_NAME,
+                session=session,
+            )
+        session.commit()
+
+    runs = service.list_runs(service_name=SERVICE1_NAME, session=session)
+    assert [run["timestamp"] for run in runs] == sorted(times, reverse=True)
+    runs = service.list_runs(service_name=SERVICE1_NAME, limit=2, session=session)
+    assert [run["timestamp"] for run in runs] == sorted(times, reverse=True)[:2]
@@ -1,9 +1,14 @@
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
 from httpx import Response
+from starlette.routing import Route
 
 TEST_USER_EMAIL = "test@test.com"
 TEST_USER_PASSWORD = "test"
 
+# HTTP methods that assert_routes_unauthorized doesn't try.
+UNCHECKED_METHODS = frozenset(("HEAD", "OPTIONS"))
+
 
 def get_token(
     client: TestClient, email: str = TEST_USER_EMAIL, password: str = TEST_USER_PASSWORD
@@ -23,12 +28,10 @@ def can_login(
 ) -> bool:
     """Return true if the given credentials can be used to log in."""
     response = get_token(client, email=email, password=password)
-    body = response.json
-    return (
-        response.status_code == 200
-        and body is not None
-        and set(body().keys()) == {"access_token", "refresh_token"}
-    )
+    if response.status_code != 200:
+        return False
+    body = response.json()
+    return body is not None and set(body.keys()) == {"access_token", "refresh_token"}
 
 
 def assert_unauthorized(client: TestClient, method: str, endpoint: str) -> None:
@@ -36,3 +39,26 @@ def assert_unauthorized(client: TestClient, method: str, endpoint: str) -> None:
     method_func = getattr(client, method)
     response = method_func(endpoint)
     assert response.status_code == 401
+
+
+def assert_routes_unauthorized(client: TestClient, app: FastAPI, prefix: str) -> None:
+    """Assert that calling any of the end points of `app` whose path starts with
+    `prefix` with the given client returns 401.
+
+    Every method of each route is called, except for HEAD and OPTIONS. Where a route
+    has those, they are answered by the same endpoint as GET, or by middleware.
+    """
+    endpoints = []
+    for route in app.routes:
+        if not isinstance(route, Route):
+            # For some reason, FastAPI type-annotates app.routes as Sequence[BaseRoute],
+            # rather than Sequence[Route]. In case we ever encounter a router isn't a
+            # Route, raise an error.
+            raise ValueError(f"route {route} is not a Route")
+        if route.methods and route.path.startswith(prefix):
+            endpoints.extend(
+                (method.lower(), route.path)
+                for method in route.methods - UNCHECKED_METHODS
+            )
+    for method, path in endpoints:
+        assert_unauthorized(client, method, path)